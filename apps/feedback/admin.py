@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from apps.feedback.models import NotificationsReceiver, OrderNotification
+from apps.feedback.models import (NotificationJob, NotificationsReceiver,
+                                  OrderNotification)
 
 
 @admin.register(NotificationsReceiver)
@@ -10,4 +11,10 @@ class NotificationsReceiverAdmin(admin.ModelAdmin):
 
 @admin.register(OrderNotification)
 class OrderNotificationAdmin(admin.ModelAdmin):
-    list_display = ["id", "is_sent"]
+    list_display = ["id", "is_sent", "job"]
+
+
+@admin.register(NotificationJob)
+class NotificationJobAdmin(admin.ModelAdmin):
+    list_display = ["id", "receiver", "status", "attempts", "available_at"]
+    list_filter = ["status"]
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, Iterable, Optional
 
 from apps.feedback.bot.utils.message import SingleMessage
 
@@ -6,9 +7,18 @@ from apps.feedback.bot.utils.message import SingleMessage
 class BaseBot(ABC):
     """Abstract class for messenger bots."""
 
+    # max number of characters in one message, None if there is no limit
+    MAX_MESSAGE_LENGTH: Optional[int] = None
+
     def __init__(self, token: str) -> None:
         self.token = token
 
+    async def __aenter__(self) -> 'BaseBot':
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_tb) -> None:
+        await self.close()
+
     @abstractmethod
     async def send_message(self, message: SingleMessage, user_id: int) -> None:
         """Send message by user id.
@@ -18,6 +28,27 @@ class BaseBot(ABC):
             user_id (int): User id from messenger.
         """
 
+    async def send_many(
+        self,
+        messages: Iterable[SingleMessage],
+        user_id: int
+    ) -> AsyncIterator[SingleMessage]:
+        """Send messages by user id one after another.
+
+        Messages are yielded as soon as they are delivered, sending stops
+        at the first failed message and its error is raised.
+
+        Args:
+            messages (Iterable[SingleMessage]): Messages to send, could be lazy.
+            user_id (int): User id from messenger.
+
+        Yields:
+            SingleMessage: Delivered message.
+        """
+        for message in messages:
+            await self.send_message(message, user_id)
+            yield message
+
     @abstractmethod
     async def close(self) -> None:
         """Close the bot connection."""
@@ -0,0 +1,67 @@
+import asyncio
+import time
+from typing import Dict, Hashable
+
+
+class TokenBucket:
+    """Limiter of the rate of events for coroutines of one event loop.
+
+    Tokens are refilled continuously at `rate` per second up to `capacity`,
+    every event takes one token.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait for a token and take it."""
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Don't give tokens for the number of seconds."""
+        self._refill()
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+
+class ChatRateLimiter:
+    """Limiter of messages sent by a bot, both in total and to every chat."""
+
+    def __init__(
+        self,
+        global_rate: float,
+        chat_rate: float,
+        chat_capacity: float = 1
+    ) -> None:
+        self.global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self.chat_rate = chat_rate
+        self.chat_capacity = chat_capacity
+        self.chat_buckets: Dict[Hashable, TokenBucket] = {}
+
+    async def acquire(self, chat_id: Hashable) -> None:
+        """Wait until a message can be sent to the chat."""
+        # the chat limit is awaited first, so waiting chats don't hold global tokens
+        await self._get_chat_bucket(chat_id).acquire()
+        await self.global_bucket.acquire()
+
+    def pause(self, seconds: float) -> None:
+        """Stop sending any messages for the number of seconds, i.e. on flood control."""
+        self.global_bucket.pause(seconds)
+
+    def _get_chat_bucket(self, chat_id: Hashable) -> TokenBucket:
+        if chat_id not in self.chat_buckets:
+            self.chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_capacity)
+        return self.chat_buckets[chat_id]
@@ -0,0 +1,72 @@
+import asyncio
+from threading import Thread
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from apps.feedback.bot.base import BaseBot
+
+T = TypeVar("T")
+
+
+class BotRuntime:
+    """Event loop running in a background thread with an opened bot.
+
+    The bot and its HTTP session live as long as the runtime, so
+    connections are reused between calls of `run`.
+    """
+
+    def __init__(self, bot_factory: Callable[[], BaseBot]) -> None:
+        self.bot_factory = bot_factory
+        self.bot: Optional[BaseBot] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self) -> None:
+        """Start the event loop thread and open the bot."""
+        if self.is_running:
+            return
+        self.loop = asyncio.new_event_loop()
+        self.thread = Thread(
+            target=self.loop.run_forever,
+            name="bot-runtime",
+            daemon=True,
+        )
+        self.thread.start()
+        self.bot = self.submit(self._open_bot())
+
+    def run(self, function: Callable[[BaseBot], Awaitable[T]]) -> T:
+        """Run the coroutine function with the bot in the event loop and wait for its result.
+
+        Args:
+            function (Callable[[BaseBot], Awaitable[T]]): Coroutine function taking the bot
+
+        Returns:
+            T: Result of the coroutine
+        """
+        self.start()
+        return self.submit(function(self.bot))
+
+    def submit(self, coroutine: Awaitable[T]) -> T:
+        """Run the coroutine in the event loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def stop(self) -> None:
+        """Close the bot and stop the event loop thread."""
+        if not self.is_running:
+            return
+        try:
+            self.submit(self.bot.__aexit__(None, None, None))
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+            self.bot = None
+            self.loop = None
+            self.thread = None
+
+    async def _open_bot(self) -> BaseBot:
+        # created inside the loop, so asyncio primitives of the bot are bound to it
+        return await self.bot_factory().__aenter__()
@@ -1,18 +1,37 @@
+import asyncio
+from typing import AsyncIterator, Iterable, Optional
+
 from aiogram import Bot
+from aiogram.bot.api import TELEGRAM_PRODUCTION, TelegramAPIServer
+from aiogram.utils.exceptions import RetryAfter
 from apps.feedback.bot.base import BaseBot
 from apps.feedback.bot.exceptions import BotIsNoneException
+from apps.feedback.bot.rate_limiter import ChatRateLimiter
 from apps.feedback.bot.utils.message import SingleMessage
+from apps.orders.utils.logger import get_default_logger
 
 
 class TelegramBot(BaseBot):
 
-    def __init__(self, token: str) -> None:
+    MAX_MESSAGE_LENGTH = 4096
+    # number of repeated sends of a message after flood control errors
+    MAX_RETRIES = 3
+
+    def __init__(
+        self,
+        token: str,
+        server: TelegramAPIServer = TELEGRAM_PRODUCTION,
+        rate_limiter: Optional[ChatRateLimiter] = None,
+    ) -> None:
         super().__init__(token)
         self.token = token
+        self.server = server
+        self.rate_limiter = rate_limiter
         self.bot: Bot = None
+        self.logger = get_default_logger("TelegramBot")
 
     async def __aenter__(self) -> 'TelegramBot':
-        self.bot = Bot(self.token)
+        self.bot = Bot(self.token, server=self.server)
         return self
 
     async def __aexit__(self, exc_type, exc_value, exc_tb) -> None:
@@ -26,7 +45,49 @@ class TelegramBot(BaseBot):
             user_id (int): Receiver id
         """
         self.require_bot()
-        await self.bot.send_message(chat_id=user_id, text=message.message)
+        for attempt in range(self.MAX_RETRIES + 1):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(user_id)
+            try:
+                await self.bot.send_message(chat_id=user_id, text=message.message)
+                return
+            except RetryAfter as error:
+                if attempt == self.MAX_RETRIES:
+                    raise
+                self.logger.warning(
+                    "Flood control exceeded, retrying in %s seconds",
+                    error.timeout
+                )
+                if self.rate_limiter is not None:
+                    self.rate_limiter.pause(error.timeout)
+                else:
+                    await asyncio.sleep(error.timeout)
+
+    async def send_many(
+        self,
+        messages: Iterable[SingleMessage],
+        user_id: int
+    ) -> AsyncIterator[SingleMessage]:
+        """Send messages by telegram bot, keeping their order.
+
+        The next message is prepared while the current one is being sent.
+
+        Args:
+            messages (Iterable[SingleMessage]): Messages to send, could be lazy.
+            user_id (int): Receiver id
+
+        Yields:
+            SingleMessage: Delivered message.
+        """
+        self.require_bot()
+        messages = iter(messages)
+        message = next(messages, None)
+        while message is not None:
+            sending = asyncio.ensure_future(self.send_message(message, user_id))
+            next_message = next(messages, None)
+            await sending
+            yield message
+            message = next_message
 
     async def close(self) -> None:
         """Close the bot connection."""
@@ -0,0 +1,33 @@
+# Generated by Django 4.0.7 on 2026-10-18 19:45
+
+from django.db import migrations, models
+
+
+def deduplicate_notifications(apps, schema_editor):
+    """Keep one notification per order and receiver, a sent one if any."""
+    OrderNotification = apps.get_model('feedback', 'OrderNotification')
+    duplicates = OrderNotification.objects.values('order_id', 'receiver_id') \
+        .annotate(notifications_count=models.Count('id')) \
+        .filter(notifications_count__gt=1)
+    for pair in duplicates.iterator():
+        notifications = OrderNotification.objects.filter(
+            order_id=pair['order_id'],
+            receiver_id=pair['receiver_id'],
+        ).order_by('-is_sent', 'id')
+        kept = notifications.first()
+        notifications.exclude(id=kept.id).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0003_alter_ordernotification_order_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_notifications, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ordernotification',
+            constraint=models.UniqueConstraint(fields=('order', 'receiver'), name='unique_order_notification_per_receiver'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.0.7 on 2026-10-18 19:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0004_unique_order_notification_per_receiver'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает отправки'), ('processing', 'Отправляется'), ('done', 'Отправлено'), ('failed', 'Не отправлено')], default='pending', max_length=20, verbose_name='Статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Количество попыток')),
+                ('available_at', models.DateTimeField(verbose_name='Доступно с')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Захвачено в')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('receiver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='feedback.notificationsreceiver', verbose_name='Получатель сообщения')),
+            ],
+            options={
+                'verbose_name': 'Задание на отправку уведомлений',
+                'verbose_name_plural': 'Задания на отправку уведомлений',
+            },
+        ),
+        migrations.AddField(
+            model_name='ordernotification',
+            name='job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notifications', to='feedback.notificationjob', verbose_name='Задание на отправку'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationjob',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['available_at'], name='pending_notification_job_idx'),
+        ),
+    ]
@@ -24,6 +24,62 @@ class NotificationsReceiver(models.Model):
         return f"Получатель сообщений #{self.id}"
 
 
+class NotificationJob(models.Model):
+    """Outbox entry: notification of the receiver about a batch of orders.
+
+    Orders of the job are its unsent OrderNotifications.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Ожидает отправки"
+        PROCESSING = "processing", "Отправляется"
+        DONE = "done", "Отправлено"
+        FAILED = "failed", "Не отправлено"
+
+    receiver = models.ForeignKey(
+        NotificationsReceiver,
+        on_delete=models.CASCADE,
+        verbose_name="Получатель сообщения",
+        related_name="jobs"
+    )
+    status = models.CharField(
+        verbose_name="Статус",
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name="Количество попыток",
+        default=0,
+    )
+    # the job can't be claimed before this time, used for backoff of retries
+    available_at = models.DateTimeField(verbose_name="Доступно с")
+    # set when claimed, a processing job with an expired lock is claimed again
+    locked_at = models.DateTimeField(
+        verbose_name="Захвачено в",
+        null=True, blank=True,
+    )
+    last_error = models.TextField(
+        verbose_name="Последняя ошибка",
+        blank=True,
+    )
+    created_at = models.DateTimeField(verbose_name="Дата создания", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Задание на отправку уведомлений"
+        verbose_name_plural = "Задания на отправку уведомлений"
+        indexes = [
+            models.Index(
+                fields=["available_at"],
+                name="pending_notification_job_idx",
+                condition=models.Q(status="pending"),
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Задание на отправку уведомлений #{self.id}"
+
+
 class OrderNotification(models.Model):
     order = models.ForeignKey(
         Order,
@@ -41,10 +97,24 @@ class OrderNotification(models.Model):
         verbose_name="Уведомление отправлено?",
         default=False,
     )
+    # set while the notification is queued in the outbox
+    job = models.ForeignKey(
+        NotificationJob,
+        on_delete=models.SET_NULL,
+        verbose_name="Задание на отправку",
+        related_name="notifications",
+        null=True, blank=True,
+    )
 
     class Meta:
         verbose_name = "Уведомление о заказе"
         verbose_name_plural = "Уведомления о заказах"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["order", "receiver"],
+                name="unique_order_notification_per_receiver",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Уведомление по заказу #{self.id}"
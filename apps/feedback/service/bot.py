@@ -1,5 +1,8 @@
-from typing import Iterable
+from typing import Iterable, Iterator, List, Optional, Tuple
 
+from aiogram.bot.api import TELEGRAM_PRODUCTION, TelegramAPIServer
+from apps.feedback.bot.rate_limiter import ChatRateLimiter
+from apps.feedback.bot.runtime import BotRuntime
 from apps.feedback.bot.telegram_bot import TelegramBot
 from apps.feedback.utils.date import to_message_format
 from apps.orders.models import Order
@@ -7,12 +10,76 @@ from django.conf import settings
 
 
 def get_telegram_bot() -> TelegramBot:
-    return TelegramBot(settings.TELEGRAM_TOKEN)
+    server = TELEGRAM_PRODUCTION
+    if settings.TELEGRAM_API_URL:
+        server = TelegramAPIServer.from_base(settings.TELEGRAM_API_URL)
+    return TelegramBot(
+        settings.TELEGRAM_TOKEN,
+        server=server,
+        rate_limiter=ChatRateLimiter(
+            global_rate=settings.TELEGRAM_GLOBAL_RATE_LIMIT,
+            chat_rate=settings.TELEGRAM_CHAT_RATE_LIMIT,
+        ),
+    )
 
 
-def build_notification_message(orders: Iterable[Order]) -> str:
-    """Get notification message for orders."""
-    return "\n====\n".join([build_single_order_message(elem) for elem in orders])
+_bot_runtime: Optional[BotRuntime] = None
+
+
+def get_bot_runtime() -> BotRuntime:
+    """Get the telegram bot runtime of the process, started on first use."""
+    global _bot_runtime
+    if _bot_runtime is None:
+        _bot_runtime = BotRuntime(get_telegram_bot)
+    _bot_runtime.start()
+    return _bot_runtime
+
+
+def close_bot_runtime() -> None:
+    """Close the bot session and stop the runtime of the process."""
+    global _bot_runtime
+    if _bot_runtime is None:
+        return
+    _bot_runtime.stop()
+    _bot_runtime = None
+
+
+ORDER_MESSAGES_SEPARATOR = "\n====\n"
+
+
+def iter_notification_messages(
+    orders: Iterable[Order],
+    max_length: Optional[int] = None
+) -> Iterator[Tuple[str, List[Order]]]:
+    """Render notification messages for orders lazily.
+
+    Orders are split into messages of at most `max_length` characters,
+    a message of a single order is truncated if it's too long.
+
+    Args:
+        orders (Iterable[Order]): Orders
+        max_length (Optional[int]): Max length of one message, unlimited if None
+
+    Yields:
+        Tuple[str, List[Order]]: Text of the message and its orders
+    """
+    parts: List[str] = []
+    parts_orders: List[Order] = []
+    length = 0
+    for order in orders:
+        part = build_single_order_message(order)
+        if max_length is not None:
+            part = part[:max_length]
+            if parts and length + len(ORDER_MESSAGES_SEPARATOR) + len(part) > max_length:
+                yield ORDER_MESSAGES_SEPARATOR.join(parts), parts_orders
+                parts, parts_orders, length = [], [], 0
+        if parts:
+            length += len(ORDER_MESSAGES_SEPARATOR)
+        parts.append(part)
+        parts_orders.append(order)
+        length += len(part)
+    if parts:
+        yield ORDER_MESSAGES_SEPARATOR.join(parts), parts_orders
 
 
 def build_single_order_message(order: Order) -> str:
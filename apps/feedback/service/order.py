@@ -1,58 +1,152 @@
+from dataclasses import dataclass
 from datetime import date
-from typing import Iterable
+from typing import Iterable, List, Optional, Sequence, Tuple
 
-from apps.feedback.models import OrderNotification
-from apps.feedback.service.receivers import get_receiver_by_telegram_id
+from apps.feedback.models import (NotificationJob, NotificationsReceiver,
+                                  OrderNotification)
 from apps.orders.models import Order
-from django.db.models import QuerySet
+from apps.orders.service.usecases.order import get_all_orders
+from apps.orders.utils.iter_utils import chunked
+from django.db import connection
 
+# changes of these fields of an order can make it due for a notification
+NOTIFIED_ORDER_FIELDS = ("delivery_date", "deleted_at")
 
-def get_outdated_orders_without_sent_notifications(
-    receiver_telegram_id: int,
-    date_: date
-) -> QuerySet[Order]:
-    """Get outdated orders for which notifications haven't yet been sent
+
+@dataclass
+class ReceiverNotification:
+    """Outdated orders to notify the receiver about."""
+    receiver: NotificationsReceiver
+    orders: List[Order]
+    # outbox job the notification is sent by
+    job: Optional[NotificationJob] = None
+
+
+def plan_notifications(
+    date_: date,
+    order_ids: Optional[Iterable[int]] = None,
+    since: Optional[date] = None
+) -> List[ReceiverNotification]:
+    """Get outdated orders without sent or queued notifications for all receivers.
+
+    Pairs of receivers and orders are selected with one anti-join query.
 
     Args:
-        receiver_telegram_id (int): User id from Telegram
         date_ (date): Date limit
+        order_ids (Optional[Iterable[int]]): If given, only these orders are checked
+        since (Optional[date]): If given, only orders delivered since this date are checked
 
     Returns:
-        QuerySet[Order]: QuerySet of orders.
+        List[ReceiverNotification]: Orders by receiver, receivers
+        without orders to notify about are skipped
     """
-    qs = Order.objects.filter(
-        delivery_date__lte=date_
+    orders = get_all_orders().filter(delivery_date__lte=date_)
+    if order_ids is not None:
+        orders = orders.filter(id__in=order_ids)
+    if since is not None:
+        orders = orders.filter(delivery_date__gte=since)
+    orders_sql, params = orders.query.sql_with_params()
+    quote_name = connection.ops.quote_name
+    receiver_table = quote_name(NotificationsReceiver._meta.db_table)
+    notification_table = quote_name(OrderNotification._meta.db_table)
+    pairs = Order.objects.raw(
+        "SELECT orders.*, " +
+        f"receivers.{quote_name('id')} AS planned_receiver_id, " +
+        f"receivers.{quote_name('telegram_id')} AS planned_receiver_telegram_id, " +
+        f"receivers.{quote_name('name')} AS planned_receiver_name " +
+        f"FROM ({orders_sql}) orders CROSS JOIN {receiver_table} receivers " +
+        f"WHERE NOT EXISTS (SELECT 1 FROM {notification_table} notifications " +
+        f"WHERE notifications.{quote_name('order_id')} = orders.{quote_name('id')} " +
+        f"AND notifications.{quote_name('receiver_id')} = receivers.{quote_name('id')} " +
+        f"AND (notifications.{quote_name('is_sent')} " +
+        f"OR notifications.{quote_name('job_id')} IS NOT NULL)) " +
+        f"ORDER BY receivers.{quote_name('id')}, orders.{quote_name('id')}",
+        params
     )
-    sent_notifications = OrderNotification.objects.filter(
-        receiver__telegram_id__iexact=receiver_telegram_id,
-        is_sent=True,
-    ).values_list("id", flat=True)
-    if sent_notifications.exists():
-        qs = qs.exclude(notifications__id__in=sent_notifications)
-    return qs
+    result: List[ReceiverNotification] = []
+    for order in pairs:
+        if not result or result[-1].receiver.id != order.planned_receiver_id:
+            receiver = NotificationsReceiver(
+                id=order.planned_receiver_id,
+                telegram_id=order.planned_receiver_telegram_id,
+                name=order.planned_receiver_name,
+            )
+            result.append(ReceiverNotification(receiver=receiver, orders=[]))
+        result[-1].orders.append(order)
+    return result
 
 
-def mark_orders_as_sent(orders: Iterable[Order], telegram_id: int) -> QuerySet[OrderNotification]:
-    """Mark orders as sent for user.
+def mark_notifications_as_sent(
+    pairs: Iterable[Tuple[int, int]],
+    batch_size: int = 1000
+) -> int:
+    """Create or update sent notifications with `INSERT ... ON CONFLICT`.
+
+    Works with PostgreSQL and SQLite.
 
     Args:
-        orders (Iterable[Order]): Orders
-        telegram_id (int): User's ID from Telegram
+        pairs (Iterable[Tuple[int, int]]): Ids of receivers and orders
+        batch_size (int): Max number of notifications in one query
 
     Returns:
-        QuerySet[OrderNotification]: QuerySet of created
-        or updated OrderNotifications
+        int: Number of created or updated OrderNotifications
     """
-    receiver = get_receiver_by_telegram_id(telegram_id)
-    if receiver is None:
-        return OrderNotification.objects.none()
-    existing_records: QuerySet[OrderNotification] = OrderNotification.objects.filter(
-        order__in=orders,
-        receiver=receiver,
+    return upsert_notifications(
+        ((receiver_id, order_id, True) for receiver_id, order_id in pairs),
+        columns=("receiver_id", "order_id", "is_sent"),
+        update_columns=("is_sent",),
+        batch_size=batch_size,
     )
-    for elem in existing_records:
-        elem.is_sent = True
-    OrderNotification.objects.bulk_update(existing_records, ["is_sent"])
-    orders_to_create = [OrderNotification(
-        order=el, receiver=receiver, is_sent=True) for el in orders if el not in existing_records]
-    return OrderNotification.objects.bulk_create(orders_to_create)
+
+
+def upsert_notifications(
+    rows: Iterable[Tuple],
+    columns: Sequence[str],
+    update_columns: Sequence[str],
+    where: str = "",
+    batch_size: int = 1000
+) -> int:
+    """Insert notifications, update `update_columns` of existing ones.
+
+    Conflicts are detected by the unique order and receiver pair.
+
+    Args:
+        rows (Iterable[Tuple]): Values of `columns` for every notification
+        columns (Sequence[str]): Inserted columns, must include order_id and receiver_id
+        update_columns (Sequence[str]): Columns updated on conflict
+        where (str): Condition of the update, existing row is referenced by the table name
+        batch_size (int): Max number of notifications in one query
+
+    Returns:
+        int: Number of created or updated OrderNotifications
+    """
+    quote_name = connection.ops.quote_name
+    max_query_params = connection.features.max_query_params
+    if max_query_params is not None:
+        batch_size = min(batch_size, max_query_params // len(columns))
+    sql = "INSERT INTO {table} ({columns}) VALUES {values} " + \
+        "ON CONFLICT ({conflict}) DO UPDATE SET {updates}"
+    if where:
+        sql += f" WHERE {where}"
+    row_sql = "({})".format(", ".join(["%s"] * len(columns)))
+    rows_upserted = 0
+    with connection.cursor() as cursor:
+        for chunk in chunked(rows, batch_size):
+            params = []
+            for row in chunk:
+                params.extend(row)
+            cursor.execute(
+                sql.format(
+                    table=quote_name(OrderNotification._meta.db_table),
+                    columns=", ".join(map(quote_name, columns)),
+                    values=", ".join([row_sql] * len(chunk)),
+                    conflict=", ".join(map(quote_name, ("order_id", "receiver_id"))),
+                    updates=", ".join(
+                        f"{quote_name(column)} = EXCLUDED.{quote_name(column)}"
+                        for column in update_columns
+                    ),
+                ),
+                params
+            )
+            rows_upserted += cursor.rowcount
+    return rows_upserted
@@ -0,0 +1,202 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from itertools import groupby
+from typing import Iterable, List, Optional
+
+from apps.feedback.models import NotificationJob, OrderNotification
+from apps.feedback.service.order import (ReceiverNotification,
+                                         mark_notifications_as_sent,
+                                         upsert_notifications)
+from apps.orders.service.usecases.order import get_all_orders
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+
+@dataclass
+class NotificationJobResult:
+    """Outcome of one attempt to send the notification of the job."""
+    job: NotificationJob
+    delivered_order_ids: List[int] = field(default_factory=list)
+    # None if the job succeeded
+    error: Optional[str] = None
+
+
+def enqueue_notifications(
+    notifications: Iterable[ReceiverNotification],
+    available_at: Optional[datetime] = None
+) -> List[NotificationJob]:
+    """Put planned notifications into the outbox, one job per receiver.
+
+    Orders which were queued by a concurrent planner in the meantime
+    are left in their job, so a job can end up without orders.
+
+    Args:
+        notifications (Iterable[ReceiverNotification]): Planned notifications
+        available_at (Optional[datetime]): Time the jobs can be claimed from, now by default
+
+    Returns:
+        List[NotificationJob]: Created jobs
+    """
+    notifications = list(notifications)
+    if not notifications:
+        return []
+    available_at = available_at or timezone.now()
+    quote_name = connection.ops.quote_name
+    table = quote_name(OrderNotification._meta.db_table)
+    with transaction.atomic():
+        jobs = NotificationJob.objects.bulk_create([
+            NotificationJob(receiver=notification.receiver, available_at=available_at)
+            for notification in notifications
+        ])
+        upsert_notifications(
+            (
+                (job.receiver.id, order.id, False, job.id)
+                for job, notification in zip(jobs, notifications)
+                for order in notification.orders
+            ),
+            columns=("receiver_id", "order_id", "is_sent", "job_id"),
+            update_columns=("job_id",),
+            where=f"{table}.{quote_name('job_id')} IS NULL " +
+                  f"AND NOT {table}.{quote_name('is_sent')}",
+        )
+    return jobs
+
+
+def claim_notification_jobs(limit: int, lease: timedelta) -> List[NotificationJob]:
+    """Lock due jobs with `SELECT ... FOR UPDATE SKIP LOCKED` and mark them as processing.
+
+    Jobs which stay processing longer than `lease` are considered
+    abandoned by a dead worker and are claimed again.
+
+    Args:
+        limit (int): Max number of claimed jobs
+        lease (timedelta): Time the job is owned by the worker
+
+    Returns:
+        List[NotificationJob]: Claimed jobs with their receivers
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job_ids = list(
+            NotificationJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=NotificationJob.Status.PENDING, available_at__lte=now) |
+                Q(status=NotificationJob.Status.PROCESSING, locked_at__lt=now - lease)
+            )
+            .order_by("available_at", "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if not job_ids:
+            return []
+        NotificationJob.objects.filter(id__in=job_ids).update(
+            status=NotificationJob.Status.PROCESSING,
+            locked_at=now,
+            attempts=F("attempts") + 1,
+        )
+    return list(
+        NotificationJob.objects.select_related("receiver")
+        .filter(id__in=job_ids)
+        .order_by("id")
+    )
+
+
+def load_job_notifications(
+    jobs: Iterable[NotificationJob],
+    date_: date
+) -> List[ReceiverNotification]:
+    """Get unsent orders of the jobs which are still outdated.
+
+    Args:
+        jobs (Iterable[NotificationJob]): Claimed jobs
+        date_ (date): Date limit
+
+    Returns:
+        List[ReceiverNotification]: Notification for every job, possibly without orders
+    """
+    jobs = list(jobs)
+    orders = get_all_orders() \
+        .filter(
+            delivery_date__lte=date_,
+            notifications__job__in=jobs,
+            notifications__is_sent=False,
+        ) \
+        .annotate(notification_job_id=F("notifications__job_id")) \
+        .order_by("notification_job_id", "id")
+    orders_by_job = {
+        job_id: list(job_orders)
+        for job_id, job_orders in groupby(orders, key=lambda order: order.notification_job_id)
+    }
+    return [
+        ReceiverNotification(
+            receiver=job.receiver,
+            orders=orders_by_job.get(job.id, []),
+            job=job,
+        )
+        for job in jobs
+    ]
+
+
+def get_retry_delay(attempts: int, backoff: float, max_backoff: float) -> timedelta:
+    """Get exponential backoff before the next attempt.
+
+    Args:
+        attempts (int): Number of made attempts
+        backoff (float): Delay after the first attempt, in seconds
+        max_backoff (float): Max delay, in seconds
+
+    Returns:
+        timedelta: Delay before the next attempt
+    """
+    return timedelta(seconds=min(backoff * 2 ** max(attempts - 1, 0), max_backoff))
+
+
+def finish_notification_jobs(
+    results: Iterable[NotificationJobResult],
+    max_attempts: int,
+    backoff: float,
+    max_backoff: float
+) -> None:
+    """Mark delivered orders as sent and move the jobs out of processing.
+
+    Succeeded jobs are done. Failed ones are retried with exponential backoff,
+    after `max_attempts` they fail and release their orders, so the next
+    planner run queues them again.
+
+    Args:
+        results (Iterable[NotificationJobResult]): Outcomes of claimed jobs
+        max_attempts (int): Max number of attempts of one job
+        backoff (float): Delay after the first failed attempt, in seconds
+        max_backoff (float): Max delay between attempts, in seconds
+    """
+    results = list(results)
+    now = timezone.now()
+    with transaction.atomic():
+        mark_notifications_as_sent(
+            (result.job.receiver_id, order_id)
+            for result in results
+            for order_id in result.delivered_order_ids
+        )
+        released_job_ids = []
+        for result in results:
+            job = result.job
+            job.locked_at = None
+            if result.error is None:
+                job.status = NotificationJob.Status.DONE
+                released_job_ids.append(job.id)
+            elif job.attempts >= max_attempts:
+                job.status = NotificationJob.Status.FAILED
+                job.last_error = result.error
+                released_job_ids.append(job.id)
+            else:
+                job.status = NotificationJob.Status.PENDING
+                job.last_error = result.error
+                job.available_at = now + get_retry_delay(job.attempts, backoff, max_backoff)
+        NotificationJob.objects.bulk_update(
+            [result.job for result in results],
+            ["status", "locked_at", "last_error", "available_at"],
+        )
+        # unsent orders of finished jobs can be queued again by the planner
+        OrderNotification.objects \
+            .filter(job_id__in=released_job_ids, is_sent=False) \
+            .update(job=None)
@@ -1 +1,2 @@
+from .deliver_notifications_task import DeliverNotificationsTask
 from .send_notifications_task import SendNotificationsTask
@@ -0,0 +1,150 @@
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Iterator, List
+
+from aiogram.utils.exceptions import ChatNotFound
+from apps.feedback.bot.base import BaseBot
+from apps.feedback.bot.utils.message import SingleMessage
+from apps.feedback.service.bot import (close_bot_runtime, get_bot_runtime,
+                                       iter_notification_messages)
+from apps.feedback.service.order import ReceiverNotification
+from apps.feedback.service.outbox import (NotificationJobResult,
+                                          claim_notification_jobs,
+                                          finish_notification_jobs,
+                                          load_job_notifications)
+from apps.orders.models import Order
+from apps.orders.utils.logger import get_default_logger
+from asgiref.sync import sync_to_async
+from celery import Task
+from celery.signals import (worker_process_init, worker_process_shutdown,
+                            worker_shutdown)
+from django.conf import settings
+from project import celery_app
+
+
+class DeliverNotificationsTask(Task):
+    """Send notifications of the outbox jobs.
+
+    Any number of these tasks can run at once, every job is claimed
+    by one of them with `SELECT ... FOR UPDATE SKIP LOCKED`.
+    """
+
+    name = "apps.feedback.tasks.DeliverNotificationsTask"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.logger = get_default_logger("DeliverNotificationsTask")
+
+    def run(self, *args, **kwargs):
+        get_bot_runtime().run(self.deliver_notifications)
+
+    async def deliver_notifications(self, bot: BaseBot) -> None:
+        """Claim and send jobs until there are no due ones.
+
+        Database work of a batch happens in one sync block: results of the
+        previous batch are written and the next batch is claimed while the
+        current one is being sent.
+
+        Args:
+            bot (BaseBot): Opened bot of the worker
+        """
+        semaphore = asyncio.Semaphore(settings.NOTIFICATIONS_CONCURRENCY)
+
+        async def send(notification: ReceiverNotification) -> NotificationJobResult:
+            async with semaphore:
+                return await self._send_message_to_user(notification, bot)
+
+        results: List[NotificationJobResult] = []
+        notifications = await sync_to_async(self._finish_and_claim)(results)
+        while notifications:
+            sending = asyncio.gather(*map(send, notifications))
+            notifications = await sync_to_async(self._finish_and_claim)(results)
+            results = await sending
+        if results:
+            await sync_to_async(self._finish_and_claim)(results, claim=False)
+
+    def _finish_and_claim(
+        self,
+        results: List[NotificationJobResult],
+        claim: bool = True
+    ) -> List[ReceiverNotification]:
+        """Write results of sent jobs and claim the next batch.
+
+        Args:
+            results (List[NotificationJobResult]): Outcomes of sent jobs
+            claim (bool): Whether to claim the next batch
+
+        Returns:
+            List[ReceiverNotification]: Notifications of claimed jobs
+        """
+        if results:
+            finish_notification_jobs(
+                results,
+                max_attempts=settings.NOTIFICATIONS_MAX_ATTEMPTS,
+                backoff=settings.NOTIFICATIONS_RETRY_BACKOFF,
+                max_backoff=settings.NOTIFICATIONS_RETRY_BACKOFF_MAX,
+            )
+        if not claim:
+            return []
+        jobs = claim_notification_jobs(
+            limit=settings.NOTIFICATIONS_CLAIM_SIZE,
+            lease=timedelta(seconds=settings.NOTIFICATIONS_JOB_LEASE),
+        )
+        return load_job_notifications(jobs, datetime.now().date())
+
+    async def _send_message_to_user(
+        self,
+        notification: ReceiverNotification,
+        bot: BaseBot
+    ) -> NotificationJobResult:
+        result = NotificationJobResult(job=notification.job)
+        # orders of messages which were rendered, but not delivered yet
+        pending_orders: Deque[List[Order]] = deque()
+
+        def render_messages() -> Iterator[SingleMessage]:
+            for text, orders in iter_notification_messages(
+                notification.orders,
+                bot.MAX_MESSAGE_LENGTH
+            ):
+                pending_orders.append(orders)
+                yield SingleMessage(text)
+
+        try:
+            async for _ in bot.send_many(
+                render_messages(),
+                user_id=notification.receiver.telegram_id
+            ):
+                result.delivered_order_ids.extend(
+                    order.id for order in pending_orders.popleft()
+                )
+        except ChatNotFound as error:
+            self.logger.error(
+                "ChatNotFound error occurred. " +
+                "Are you sure that the user have sent any message to the bot?"
+            )
+            result.error = str(error)
+        except Exception as error:
+            self.logger.error(
+                "Failed to notify receiver %s: %s",
+                notification.receiver.telegram_id,
+                error
+            )
+            result.error = f"{type(error).__name__}: {error}"
+        # orders of delivered messages are marked even if the rest failed
+        return result
+
+
+@worker_process_init.connect
+def start_bot_runtime(**kwargs) -> None:
+    """Open the bot session once per worker process, it's reused by all tasks."""
+    get_bot_runtime()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def stop_bot_runtime(**kwargs) -> None:
+    close_bot_runtime()
+
+
+celery_app.register_task(DeliverNotificationsTask())
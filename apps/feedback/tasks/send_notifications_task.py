@@ -1,72 +1,68 @@
-import asyncio
+import math
 from datetime import datetime
+from typing import Any, Dict, Optional
 
-from aiogram.utils.exceptions import ChatNotFound
-from apps.feedback.bot.base import BaseBot
-from apps.feedback.bot.utils.message import SingleMessage
-from apps.feedback.models import NotificationsReceiver
-from apps.feedback.service.bot import (build_notification_message,
-                                       get_telegram_bot)
-from apps.feedback.service.order import (
-    get_outdated_orders_without_sent_notifications, mark_orders_as_sent)
-from apps.feedback.service.receivers import get_all_receivers
+from apps.feedback.service.order import (NOTIFIED_ORDER_FIELDS,
+                                         plan_notifications)
+from apps.feedback.service.outbox import enqueue_notifications
+from apps.feedback.tasks.deliver_notifications_task import \
+    DeliverNotificationsTask
+from apps.orders.service.sync.change_set import OrdersChangeSet
 from apps.orders.utils.logger import get_default_logger
-from asgiref.sync import sync_to_async
 from celery import Task
+from django.conf import settings
 from project import celery_app
 
 
 class SendNotificationsTask(Task):
+    """Queue notifications about outdated orders into the outbox."""
+
     name = "apps.feedback.tasks.SendNotificationsTask"
 
     def __init__(self) -> None:
         super().__init__()
         self.logger = get_default_logger("SendNotificationsTask")
 
-    def run(self, *args, **kwargs):
-        asyncio.get_event_loop().run_until_complete(
-            self.send_notifications()
-        )
+    def run(
+        self,
+        changes: Optional[Dict[str, Any]] = None,
+        due_today: bool = False,
+        *args,
+        **kwargs
+    ):
+        """Queue notifications about outdated orders and start their delivery.
 
-    async def send_notifications(self) -> None:
-        receivers = await sync_to_async(list)(get_all_receivers())
-        bot = get_telegram_bot()
-        async with bot as bot_context:
-            for person in receivers:
-                await self._send_message_to_user(person, bot_context)
+        Orders become outdated only when they change or when their delivery
+        date comes, so changed orders are checked after every sync and orders
+        delivered today are checked once a day, right after midnight.
 
-    async def _send_message_to_user(
-        self,
-        receiver: NotificationsReceiver,
-        bot: BaseBot
-    ) -> None:
-        now = datetime.now()
-        # Get the QuerySet
-        query_set_of_outdated_orders = await sync_to_async(
-            get_outdated_orders_without_sent_notifications
-        )(receiver.telegram_id, date_=now.date())
-        # Evaluate the queryset
-        orders_without_notifications = await sync_to_async(list)(
-            query_set_of_outdated_orders
-        )
-        if len(orders_without_notifications) == 0:
+        Args:
+            changes (Optional[Dict[str, Any]]): Serialized OrdersChangeSet,
+                if given only changed orders are checked
+            due_today (bool): If set, only orders delivered today are checked
+        """
+        today = datetime.now().date()
+        order_ids = None
+        since = None
+        if changes is not None:
+            change_set = OrdersChangeSet.from_dict(changes)
+            order_ids = list(change_set.iter_changed_ids(*NOTIFIED_ORDER_FIELDS))
+            if not order_ids:
+                self.logger.info("No orders to notify about have changed, skipping...")
+                return
+        elif due_today:
+            since = today
+        notifications = plan_notifications(today, order_ids, since)
+        if len(notifications) == 0:
             self.logger.info("There are no orders to send...")
             return
-        text = build_notification_message(orders_without_notifications)
-        await bot.send_message(
-            SingleMessage(text),
-            user_id=receiver.telegram_id
-        )
-        try:
-            await sync_to_async(mark_orders_as_sent)(
-                orders_without_notifications,
-                receiver.telegram_id
-            )
-        except ChatNotFound:
-            self.logger.error(
-                "ChatNotFound error occurred. " +
-                "Are you sure that the user have sent any message to the bot?"
-            )
+        jobs = enqueue_notifications(notifications)
+        self.logger.info("Queued %s notification jobs", len(jobs))
+        # every delivery task claims jobs until the outbox is empty,
+        # so the jobs are spread over all free workers
+        deliver_notifications_task = DeliverNotificationsTask()
+        for _ in range(math.ceil(len(jobs) / settings.NOTIFICATIONS_CLAIM_SIZE)):
+            deliver_notifications_task.delay()
 
 
 celery_app.register_task(SendNotificationsTask())
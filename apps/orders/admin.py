@@ -1,8 +1,14 @@
 from django.contrib import admin
 
-from apps.orders.models import Order
+from apps.orders.models import CurrencyRate, Order
 
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ["id", "order_id", "cost_dollars", "cost_rubles"]
+    list_display = ["id", "order_id", "cost_dollars", "cost_rubles", "deleted_at"]
+    list_filter = [("deleted_at", admin.EmptyFieldListFilter)]
+
+
+@admin.register(CurrencyRate)
+class CurrencyRateAdmin(admin.ModelAdmin):
+    list_display = ["id", "currency", "date", "rubles"]
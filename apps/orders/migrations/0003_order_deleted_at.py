@@ -0,0 +1,22 @@
+# Generated by Django 4.0.7 on 2026-10-18 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_currencyrate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата удаления'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['delivery_date'], name='live_order_delivery_date_idx'),
+        ),
+    ]
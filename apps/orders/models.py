@@ -7,10 +7,45 @@ class Order(models.Model):
     cost_dollars = models.FloatField(verbose_name=_("Стоимость в долларах"),)
     cost_rubles = models.FloatField(verbose_name=_("Стоимость в рублях"))
     delivery_date = models.DateField(verbose_name=_("Дата доставки"))
+    # set instead of deleting the order in the soft-delete mode
+    deleted_at = models.DateTimeField(
+        verbose_name=_("Дата удаления"),
+        null=True,
+        blank=True,
+    )
 
     class Meta:
         verbose_name = _("Заказ")
         verbose_name_plural = _("Заказы")
+        indexes = [
+            models.Index(
+                fields=["delivery_date"],
+                name="live_order_delivery_date_idx",
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Заказ #{self.order_id}"
+
+
+class CurrencyRate(models.Model):
+    """Number of rubles for one currency unit at the date."""
+
+    currency = models.CharField(verbose_name=_("Валюта"), max_length=20)
+    date = models.DateField(verbose_name=_("Дата"))
+    rubles = models.FloatField(verbose_name=_("Количество рублей"))
+    updated_at = models.DateTimeField(verbose_name=_("Дата обновления"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Курс валюты")
+        verbose_name_plural = _("Курсы валют")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["currency", "date"],
+                name="unique_currency_rate_per_date",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Курс {self.currency} на {self.date}"
@@ -1,12 +1,20 @@
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from apps.orders.service.sync.change_set import OrdersChangeSet
 
 
 class BaseParser(ABC):
     """Abstract class for Order parsers"""
 
     @abstractmethod
-    def parse(self) -> None:
-        """Starts the actual parsing of orders."""
+    def parse(self) -> 'OrdersChangeSet':
+        """Starts the actual parsing of orders.
+
+        Returns:
+            OrdersChangeSet: Ids of created, updated and deleted orders
+        """
 
     def set_up(self) -> None:
         """Sets up the parser.
@@ -1,34 +1,34 @@
-
-from dataclasses import dataclass
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar
 
 from apps.orders.models import Order
 from apps.orders.service.repositories.currency_repository.base import \
     BaseCurrencyToRublesRepository
 from apps.orders.service.repositories.currency_repository.currencies import \
     Currency
-from apps.orders.service.usecases.order import get_all_orders, get_order_by_id
-from apps.orders.utils.convert_utils import (str_to_date, str_to_float,
-                                             str_to_int)
+from apps.orders.service.repositories.currency_repository.history import \
+    BaseRatesHistoryRepository
+from apps.orders.service.repositories.state_repository.base import \
+    BaseSyncStateRepository
+from apps.orders.service.sync.base import BaseOrdersSynchronizer
+from apps.orders.service.sync.bulk import BulkOrdersSynchronizer
+from apps.orders.service.sync.change_set import OrdersChangeSet
+from apps.orders.service.usecases.order import reprice_orders
+from apps.orders.utils.convert_utils import round_cost
 from apps.orders.utils.file_utils import check_if_file_exist
+from apps.orders.utils.hash_utils import get_fingerprint
 from apps.orders.utils.logger import get_default_logger
-from apps.orders.utils.reset_pks import reset_autoincrement_fields
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+from apps.orders.utils.reset_pks import reset_autoincrement_field_if_behind
+from django.db import connections
 
 from .base import BaseParser
+from .row_batch import GoogleSheetRow, RowBatch
+from .sheets_client import GoogleSheetsClient, Values, get_cached_client
 
-
-@dataclass
-class GoogleSheetRow:
-    """Typed data from Google Sheet's row"""
-    id: int
-    order_id: str
-    cost_dollars: float
-    cost_rubles: float
-    delivery_date: date
+T = TypeVar("T")
 
 
 class GoogleSheetsParser(BaseParser):
@@ -37,27 +37,106 @@ class GoogleSheetsParser(BaseParser):
     SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
     SAMPLE_SPREADSHEET_ID = '1bSjKMCN-7roNe0apm1E8Z8gIwbgeo448ekBWvot66zo'
     SAMPLE_RANGE_NAME = 'A:D'
+    PAYLOAD_FINGERPRINT_KEY = 'google_sheets:payload_fingerprint'
+    RUBLES_PER_DOLLAR_KEY = 'google_sheets:rubles_per_dollar'
+    NOOP_RUNS_KEY = 'google_sheets:noop_runs'
+    # number of row windows requested by one batchGet in the streaming mode
+    STREAM_WINDOWS_PER_REQUEST = 4
 
     def __init__(
         self,
         creds_path: Path,
         token_path: Path,
-        repository: BaseCurrencyToRublesRepository
+        repository: BaseCurrencyToRublesRepository,
+        synchronizer: Optional[BaseOrdersSynchronizer] = None,
+        state_repository: Optional[BaseSyncStateRepository] = None,
+        history_repository: Optional[BaseRatesHistoryRepository] = None,
+        client: Optional[GoogleSheetsClient] = None,
+        stream_window_size: Optional[int] = None,
+        native_values: bool = True,
     ) -> None:
         super().__init__()
         self.creds_path = creds_path
         self.token_path = token_path
         self.repository = repository
+        self.synchronizer = synchronizer or BulkOrdersSynchronizer()
+        self.state_repository = state_repository
+        # if set, orders are converted at the rate of their delivery date
+        self.history_repository = history_repository
+        self.client = client
+        # if set, rows are fetched lazily by windows of this size
+        self.stream_window_size = stream_window_size
+        # if set, numbers and dates are fetched unformatted, formatted
+        # strings are still parsed for legacy sheets
+        self.native_values = native_values
         self.logger = get_default_logger("GoogleSheetsParser")
         self.rows: Iterable[GoogleSheetRow] = None
         self.rubles_per_dollar: float = None
+        self.payload_fingerprint: str = None
         assert self.repository.currency == Currency.DOLLAR, \
             "The repository class should receive a number of rubles only " + \
             "for a dollar. In the context of Google Sheets Parser"
+        assert self.history_repository is None or \
+            self.history_repository.currency == Currency.DOLLAR, \
+            "The history repository class should receive rates only " + \
+            "for a dollar. In the context of Google Sheets Parser"
 
     def set_up(self) -> None:
-        self._fetch_current_rubles_course()
-        self._fetch_rows_from_google_sheets()
+        started_at = time.perf_counter()
+        if self.client is None:
+            self.client = self._build_client()
+        # the rate and the sheet are independent, so they are fetched concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            rate_future = executor.submit(
+                self._run_phase_in_thread,
+                "rate fetch",
+                self._fetch_current_rubles_course
+            )
+            if self.stream_window_size:
+                sheet_future = executor.submit(
+                    self._run_phase_in_thread,
+                    "sheet size fetch",
+                    self.client.get_row_count,
+                    self.SAMPLE_SPREADSHEET_ID
+                )
+            else:
+                sheet_future = executor.submit(
+                    self._run_phase_in_thread,
+                    "sheet fetch",
+                    self._fetch_values_from_google_sheets
+                )
+            # re-raises the exception of the phase, if any
+            rate_future.result()
+            sheet_result = sheet_future.result()
+        # rows are converted only when both the rate and the sheet are received
+        if self.stream_window_size:
+            self.rows = self._iter_rows_from_google_sheets(sheet_result)
+        else:
+            self.rows = self._run_phase(
+                "rows conversion",
+                self._convert_values_to_rows,
+                sheet_result
+            )
+        self.logger.info("Set up took %.3f seconds", time.perf_counter() - started_at)
+
+    def _run_phase(self, name: str, func: Callable[..., T], *args: Any) -> T:
+        """Run the phase of set up, logging its duration."""
+        started_at = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.logger.info(
+                "Phase '%s' took %.3f seconds",
+                name,
+                time.perf_counter() - started_at
+            )
+
+    def _run_phase_in_thread(self, name: str, func: Callable[..., T], *args: Any) -> T:
+        try:
+            return self._run_phase(name, func, *args)
+        finally:
+            # database connections are opened per thread, i.e. by the rate cache
+            connections.close_all()
 
     def _fetch_current_rubles_course(self) -> None:
         """Get the number of rubles per dollar"""
@@ -72,7 +151,7 @@ class GoogleSheetsParser(BaseParser):
             type(self.repository)
         )
 
-    def _fetch_rows_from_google_sheets(self) -> None:
+    def _build_client(self) -> GoogleSheetsClient:
         absolute_token_path = self.token_path.absolute()
         absolute_creds_path = self.creds_path.absolute()
         self.logger.info("Got absolute token path %s", absolute_token_path)
@@ -81,101 +160,144 @@ class GoogleSheetsParser(BaseParser):
             raise FileNotFoundError(
                 f"Couldn't find the creds file by path: {absolute_creds_path}"
             )
-        creds = service_account.Credentials.from_service_account_file(
-            absolute_creds_path,
-            scopes=self.SCOPES
+        started_at = time.perf_counter()
+        client = get_cached_client(absolute_creds_path, self.SCOPES)
+        self.logger.info(
+            "Got Google Sheets client in %.3f seconds",
+            time.perf_counter() - started_at
+        )
+        return client
+
+    def _fetch_values_from_google_sheets(self) -> Values:
+        values = self.client.get_values(
+            self.SAMPLE_SPREADSHEET_ID,
+            self.SAMPLE_RANGE_NAME,
+            native=self.native_values
         )
-        service = build('sheets', 'v4', credentials=creds)
-        sheet = service.spreadsheets()
-        result = sheet.values().get(
-            spreadsheetId=self.SAMPLE_SPREADSHEET_ID,
-            range=self.SAMPLE_RANGE_NAME
-        ).execute()
-        self.rows = []
-        for elem in result.get("values", []):
-            row = map_data_to_row(elem, self.rubles_per_dollar)
-            if row is not None:
-                self.rows.append(row)
-
-    def parse(self) -> None:
+        self.payload_fingerprint = get_fingerprint(values)
+        return values
+
+    def _convert_values_to_rows(self, values: Values) -> RowBatch:
+        rows = map_data_to_rows(values, self.rubles_per_dollar)
+        if self.history_repository is not None:
+            self._convert_rows_by_delivery_date(rows)
+        return rows
+
+    def _iter_rows_from_google_sheets(self, row_count: int) -> Iterator[GoogleSheetRow]:
+        """Fetch rows lazily by fixed-size windows.
+
+        Only the windows of one batchGet request are kept in memory.
+        """
+        window_size = self.stream_window_size
+        first_row = 1
+        while first_row <= row_count:
+            ranges = [
+                f"A{start}:D{start + window_size - 1}"
+                for start in range(
+                    first_row,
+                    min(first_row + window_size * self.STREAM_WINDOWS_PER_REQUEST, row_count + 1),
+                    window_size
+                )
+            ]
+            self.logger.info("Fetching rows by ranges %s", ranges)
+            for values in self.client.batch_get_values(
+                self.SAMPLE_SPREADSHEET_ID,
+                ranges,
+                native=self.native_values
+            ):
+                yield from self._convert_values_to_rows(values)
+            first_row += window_size * len(ranges)
+
+    def _convert_rows_by_delivery_date(self, rows: RowBatch) -> None:
+        """Convert costs of rows at the rate of their delivery date.
+
+        Rates for the whole range of delivery dates are loaded at once.
+        """
+        if not rows:
+            return
+        history = self.history_repository.get_history(
+            date.fromordinal(min(rows.delivery_ordinals)),
+            date.fromordinal(max(rows.delivery_ordinals))
+        )
+        self.logger.info(
+            "Got %s daily rates for currency %s from %s",
+            len(history),
+            self.history_repository.currency,
+            type(self.history_repository)
+        )
+        for index, delivery_date in enumerate(rows.delivery_dates):
+            rubles_per_dollar = history.get(delivery_date, self.rubles_per_dollar)
+            rows.cost_rubles[index] = round_cost(
+                rows.cost_dollars[index] * round(rubles_per_dollar, 2)
+            )
+
+    def parse(self) -> OrdersChangeSet:
         required_fields = [self.rows, self.rubles_per_dollar]
         assert all(elem is not None for elem in required_fields), \
             f"Some of required fields, ${required_fields} are None, " + \
             "you must call the set_up method first"
-        list(map(self._parse_single_row, self.rows))
-        row_ids = tuple(map(lambda item: item.id, self.rows))
-        # remove orders that are not presented in current data
-        orders = get_all_orders().exclude(id__in=row_ids)
-        orders_count = orders.count()
-        rows_deleted, _ = orders.delete()
-        self.logger.warning(
-            "Deletion of %s orders affected %s rows in DB",
-            orders_count,
-            rows_deleted
+        if self._is_payload_synchronized():
+            if self._is_rate_applied():
+                noop_runs = self.state_repository.increment(self.NOOP_RUNS_KEY)
+                self.logger.info(
+                    "Neither the sheet nor the rate has changed since the last run, " +
+                    "skipping the synchronization. No-op runs in total: %s",
+                    noop_runs
+                )
+                return OrdersChangeSet()
+            if self.history_repository is None:
+                return self._reprice_orders()
+        result = self.synchronizer.sync(self.rows)
+        if result.max_created_id is not None:
+            # orders are inserted with explicit ids, so the sequence of ids
+            # isn't advanced, that leads to IntegrityErrors from psql.
+            reset_autoincrement_field_if_behind(Order, result.max_created_id)
+        self._save_sync_state()
+        return result.changes
+
+    def _is_payload_synchronized(self) -> bool:
+        """Check if the fetched payload was already applied by a previous run.
+
+        The payload isn't known in advance in the streaming mode.
+        """
+        if self.state_repository is None or self.payload_fingerprint is None:
+            return False
+        return self.state_repository.get(self.PAYLOAD_FINGERPRINT_KEY) == \
+            self.payload_fingerprint
+
+    def _is_rate_applied(self) -> bool:
+        """Check if the current rate was already applied by a previous run."""
+        if self.state_repository is None:
+            return False
+        return self.state_repository.get(self.RUBLES_PER_DOLLAR_KEY) == \
+            str(self.rubles_per_dollar)
+
+    def _reprice_orders(self) -> OrdersChangeSet:
+        """Recalculate costs in rubles when only the rate has changed.
+
+        Costs in rubles aren't notified about, so the change set is empty.
+        """
+        orders_repriced = reprice_orders(self.rubles_per_dollar)
+        self.logger.info(
+            "Only the rate has changed since the last run, " +
+            "repricing at %s rubles per dollar affected %s orders",
+            self.rubles_per_dollar,
+            orders_repriced
         )
-        # reset autoincrement fields to prevent IntegrityErrors from psql.
-        reset_autoincrement_fields([Order])
-
-    def _parse_single_row(self, row: GoogleSheetRow) -> Order:
-        order = get_order_by_id(row.id)
-        return self._create_order(row) if order is None else self._update_order(order, row)
-
-    def _create_order(self, row: GoogleSheetRow) -> Order:
-        self.logger.info("Creating order from row: %s", row)
-        result = map_row_to_model(row)
-        result.save()
-        return result
-
-    def _update_order(self, order: Order, row: GoogleSheetRow) -> Order:
-        self.logger.info("Updating order from row: %s", row)
-        order.order_id = row.order_id
-        order.cost_dollars = row.cost_dollars
-        order.cost_rubles = row.cost_rubles
-        order.delivery_date = row.delivery_date
-        order.save()
-        return order
-
-
-def map_data_to_row(data: Iterable[Any], rubles_per_dollar: float) -> GoogleSheetRow:
-    """Map google sheets data to row
-
-    Args:
-        data (Iterable[Any]): Data
-        rubles_per_dollar (float): rubles per one dollar
-
-    Returns:
-        GoogleSheetRow
-    """
-    if len(data) == 0:
-        return None
-    id_ = str_to_int(data[0])
-    order_id = data[1]
-    cost_in_dollars = str_to_float(data[2])
-    delivery_date = str_to_date(data[3])
-    if any(elem is None for elem in [id_, order_id, cost_in_dollars, delivery_date]):
-        return None
-    return GoogleSheetRow(
-        id=id_,
-        order_id=order_id,
-        cost_dollars=cost_in_dollars,
-        cost_rubles=round(cost_in_dollars * rubles_per_dollar, 2),
-        delivery_date=delivery_date
-    )
-
-
-def map_row_to_model(row: GoogleSheetRow) -> Order:
-    """Map GoogleSheetRow to Order object
-
-    Args:
-        row (GoogleSheetRow): Data from Google Sheet
-
-    Returns:
-        Order: Order object
-    """
-    return Order(
-        id=row.id,
-        order_id=row.order_id,
-        cost_dollars=row.cost_dollars,
-        cost_rubles=row.cost_rubles,
-        delivery_date=row.delivery_date,
-    )
+        self._save_sync_state()
+        return OrdersChangeSet()
+
+    def _save_sync_state(self) -> None:
+        if self.state_repository is None:
+            return
+        if self.payload_fingerprint is not None:
+            self.state_repository.set(self.PAYLOAD_FINGERPRINT_KEY, self.payload_fingerprint)
+        self.state_repository.set(self.RUBLES_PER_DOLLAR_KEY, str(self.rubles_per_dollar))
+
+
+def map_data_to_rows(
+    values: Iterable[Iterable[Any]],
+    rubles_per_dollar: float
+) -> RowBatch:
+    """Map google sheets data to rows, skipping invalid ones."""
+    return RowBatch.from_values(values, rubles_per_dollar)
@@ -0,0 +1,138 @@
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Iterator, List, Optional, Sequence, Union, overload
+
+from apps.orders.utils.convert_utils import (cached_ordinal_to_date,
+                                             decode_columns, round_cost)
+
+
+@dataclass
+class GoogleSheetRow:
+    """Typed data from Google Sheet's row"""
+    id: int
+    order_id: str
+    cost_dollars: float
+    cost_rubles: float
+    delivery_date: date
+
+
+class RowBatch:
+    """Valid rows of Google Sheet stored column-wise.
+
+    Ids, costs and ordinals of delivery dates are kept in typed arrays,
+    order ids are interned strs. Rows are materialized as GoogleSheetRow
+    objects only while iterating.
+    """
+
+    __slots__ = (
+        "ids",
+        "order_ids",
+        "cost_dollars",
+        "cost_rubles",
+        "delivery_ordinals",
+        "_sorted_ids",
+    )
+
+    def __init__(
+        self,
+        ids: 'array[int]',
+        order_ids: List[str],
+        cost_dollars: 'array[float]',
+        cost_rubles: 'array[float]',
+        delivery_ordinals: 'array[int]',
+    ) -> None:
+        self.ids = ids
+        self.order_ids = order_ids
+        self.cost_dollars = cost_dollars
+        self.cost_rubles = cost_rubles
+        self.delivery_ordinals = delivery_ordinals
+        # sorted copy of ids, built by the first membership test
+        self._sorted_ids: Optional['array[int]'] = None
+
+    @classmethod
+    def from_values(
+        cls,
+        values: Sequence[Sequence[Any]],
+        rubles_per_dollar: float
+    ) -> 'RowBatch':
+        """Decode google sheets data, skipping invalid rows.
+
+        Args:
+            values (Sequence[Sequence[Any]]): Rows of cells
+            rubles_per_dollar (float): rubles per one dollar
+
+        Returns:
+            RowBatch
+        """
+        ids, order_ids, cost_dollars, delivery_ordinals = decode_columns(values)
+        cost_rubles = array(
+            'd',
+            (round_cost(cost * rubles_per_dollar) for cost in cost_dollars)
+        )
+        return cls(ids, order_ids, cost_dollars, cost_rubles, delivery_ordinals)
+
+    @property
+    def delivery_dates(self) -> Iterator[date]:
+        """Delivery dates of rows, in the order of rows."""
+        return map(cached_ordinal_to_date, self.delivery_ordinals)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[GoogleSheetRow]:
+        for id_, order_id, cost_dollars, cost_rubles, delivery_date in zip(
+            self.ids,
+            self.order_ids,
+            self.cost_dollars,
+            self.cost_rubles,
+            self.delivery_dates,
+        ):
+            yield GoogleSheetRow(
+                id=id_,
+                order_id=order_id,
+                cost_dollars=cost_dollars,
+                cost_rubles=cost_rubles,
+                delivery_date=delivery_date,
+            )
+
+    @overload
+    def __getitem__(self, index: int) -> GoogleSheetRow:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> 'RowBatch':
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[GoogleSheetRow, 'RowBatch']:
+        if isinstance(index, slice):
+            return RowBatch(
+                self.ids[index],
+                self.order_ids[index],
+                self.cost_dollars[index],
+                self.cost_rubles[index],
+                self.delivery_ordinals[index],
+            )
+        return GoogleSheetRow(
+            id=self.ids[index],
+            order_id=self.order_ids[index],
+            cost_dollars=self.cost_dollars[index],
+            cost_rubles=self.cost_rubles[index],
+            delivery_date=cached_ordinal_to_date(self.delivery_ordinals[index]),
+        )
+
+    def __contains__(self, id_: object) -> bool:
+        """Check if some of rows has the id.
+
+        Uses binary search, so the ids aren't copied into a set.
+        """
+        if self._sorted_ids is None:
+            self._sorted_ids = array('q', sorted(self.ids))
+        index = bisect_left(self._sorted_ids, id_)
+        return index < len(self._sorted_ids) and self._sorted_ids[index] == id_
+
+    def chunks(self, size: int) -> Iterator['RowBatch']:
+        """Split rows into consecutive batches of at most size rows."""
+        for start in range(0, len(self), size):
+            yield self[start:start + size]
@@ -0,0 +1,144 @@
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+import httplib2
+from google.oauth2 import service_account
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+
+Values = List[List[Any]]
+
+_clients: Dict[Tuple[str, float, Tuple[str, ...]], 'GoogleSheetsClient'] = {}
+_clients_lock = threading.Lock()
+
+
+class GoogleSheetsClient:
+    """Thin wrapper over the Google Sheets API service.
+
+    Any object with the same methods, i.e. a local fake, can be passed
+    to the parser instead.
+    """
+
+    # seconds to wait for a response of the API
+    TIMEOUT = 60
+
+    def __init__(self, service: Any) -> None:
+        self.service = service
+
+    @classmethod
+    def from_service_account_file(
+        cls,
+        creds_path: Path,
+        scopes: Iterable[str]
+    ) -> 'GoogleSheetsClient':
+        """Build the client from the service account credentials file.
+
+        The service is built from the discovery document bundled with
+        the library and uses a keep-alive HTTP transport, which refreshes
+        the token only when it is about to expire.
+        """
+        creds = service_account.Credentials.from_service_account_file(
+            creds_path,
+            scopes=scopes
+        )
+        http = AuthorizedHttp(creds, http=httplib2.Http(timeout=cls.TIMEOUT))
+        return cls(build(
+            'sheets',
+            'v4',
+            http=http,
+            static_discovery=True,
+            cache_discovery=False
+        ))
+
+    def get_values(
+        self,
+        spreadsheet_id: str,
+        range_: str,
+        native: bool = False
+    ) -> Values:
+        """Get values of the range.
+
+        Args:
+            spreadsheet_id (str): ID of the spreadsheet
+            range_ (str): Range in A1 notation
+            native (bool): Get numbers and serial numbers of dates
+                instead of formatted strings
+
+        Returns:
+            Values: Rows of the range
+        """
+        result = self.service.spreadsheets().values().get(
+            spreadsheetId=spreadsheet_id,
+            range=range_,
+            **get_render_options(native)
+        ).execute()
+        return result.get("values", [])
+
+    def batch_get_values(
+        self,
+        spreadsheet_id: str,
+        ranges: List[str],
+        native: bool = False
+    ) -> List[Values]:
+        """Get values of several ranges with one request.
+
+        Args:
+            spreadsheet_id (str): ID of the spreadsheet
+            ranges (List[str]): Ranges in A1 notation
+            native (bool): Get numbers and serial numbers of dates
+                instead of formatted strings
+
+        Returns:
+            List[Values]: Rows of every range, in the order of ranges
+        """
+        result = self.service.spreadsheets().values().batchGet(
+            spreadsheetId=spreadsheet_id,
+            ranges=ranges,
+            **get_render_options(native)
+        ).execute()
+        return [elem.get("values", []) for elem in result.get("valueRanges", [])]
+
+    def get_row_count(self, spreadsheet_id: str) -> int:
+        """Get the number of rows in the first sheet of the spreadsheet."""
+        result = self.service.spreadsheets().get(
+            spreadsheetId=spreadsheet_id,
+            fields="sheets.properties.gridProperties.rowCount"
+        ).execute()
+        return result["sheets"][0]["properties"]["gridProperties"]["rowCount"]
+
+
+def get_render_options(native: bool) -> Dict[str, str]:
+    """Get render options of values for the API request."""
+    if not native:
+        return {}
+    return {
+        "valueRenderOption": "UNFORMATTED_VALUE",
+        "dateTimeRenderOption": "SERIAL_NUMBER",
+    }
+
+
+def get_cached_client(creds_path: Path, scopes: Iterable[str]) -> GoogleSheetsClient:
+    """Get the client, which is built once per worker process.
+
+    The client is rebuilt when the credentials file is modified.
+
+    Args:
+        creds_path (Path): Path to the service account credentials file
+        scopes (Iterable[str]): Scopes of the credentials
+
+    Returns:
+        GoogleSheetsClient: Client
+    """
+    key = (str(creds_path), creds_path.stat().st_mtime, tuple(scopes))
+    with _clients_lock:
+        if key not in _clients:
+            _clients.clear()
+            _clients[key] = GoogleSheetsClient.from_service_account_file(creds_path, key[2])
+        return _clients[key]
+
+
+def clear_cached_clients() -> None:
+    """Forget the cached clients, i.e. in a forked worker process."""
+    with _clients_lock:
+        _clients.clear()
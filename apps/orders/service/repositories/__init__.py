@@ -1,5 +1,13 @@
 from .currency_repository import (BadResponseFromCurrencyAPIException,
                                   BankOfRussiaCurrencyToRublesRepository,
-                                  BaseCurrencyToRublesRepository, Currency,
+                                  BankOfRussiaRatesHistoryRepository,
+                                  BaseCurrencyToRublesRepository,
+                                  BaseRateCache, BaseRatesHistoryRepository,
+                                  CachedCurrencyToRublesRepository, Currency,
+                                  DatabaseRateCache, DjangoCacheRateCache,
+                                  MemoryRateCache,
                                   MultipleCurrenciesInResponseException,
-                                  NoSuchCurrencyInResponseException)
+                                  NoSuchCurrencyInResponseException,
+                                  RatesHistory)
+from .state_repository import (BaseSyncStateRepository,
+                               CacheSyncStateRepository)
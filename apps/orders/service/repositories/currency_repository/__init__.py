@@ -1,6 +1,11 @@
 from .base import BaseCurrencyToRublesRepository
+from .cached_repository import CachedCurrencyToRublesRepository
 from .currencies import Currency
 from .exceptions import (BadResponseFromCurrencyAPIException,
                          MultipleCurrenciesInResponseException,
                          NoSuchCurrencyInResponseException)
-from .repository import BankOfRussiaCurrencyToRublesRepository
+from .history import BaseRatesHistoryRepository, RatesHistory
+from .repository import (BankOfRussiaCurrencyToRublesRepository,
+                         BankOfRussiaRatesHistoryRepository)
+from .rate_cache import (BaseRateCache, DatabaseRateCache,
+                         DjangoCacheRateCache, MemoryRateCache)
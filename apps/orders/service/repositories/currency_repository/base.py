@@ -19,3 +19,21 @@ class BaseCurrencyToRublesRepository(ABC):
         Returns:
             float: Number of rubles for one conventional currency unit
         """
+
+    def get_amount_of_rubles_for(self, currency: Currency) -> float:
+        """Get number of rubles for one unit of any supported currency.
+
+        Args:
+            currency (Currency): Selected currency
+
+        Raises:
+            NotImplementedError: If the repository doesn't support the currency
+
+        Returns:
+            float: Number of rubles for one unit of the currency
+        """
+        if currency == self.currency:
+            return self.get_amount_of_rubles_per_currency()
+        raise NotImplementedError(
+            f"There is no implementation for currency: {currency.name}"
+        )
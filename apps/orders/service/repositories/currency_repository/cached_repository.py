@@ -0,0 +1,49 @@
+from datetime import date
+
+from apps.orders.utils.logger import get_default_logger
+
+from .base import BaseCurrencyToRublesRepository
+from .currencies import Currency
+from .rate_cache import BaseRateCache
+
+
+class CachedCurrencyToRublesRepository(BaseCurrencyToRublesRepository):
+    """Caching decorator for any repository of the ruble exchange rate.
+
+    Rates are cached by currency and date, so the wrapped repository is
+    requested at most once per day, even by concurrent workers.
+    """
+
+    def __init__(
+        self,
+        repository: BaseCurrencyToRublesRepository,
+        cache: BaseRateCache,
+        date_: date,
+    ) -> None:
+        super().__init__(repository.currency)
+        self.repository = repository
+        self.cache = cache
+        self.date = date_
+        self.logger = get_default_logger("CachedCurrencyToRublesRepository")
+
+    def get_amount_of_rubles_per_currency(self) -> float:
+        return self.get_amount_of_rubles_for(self.currency)
+
+    def get_amount_of_rubles_for(self, currency: Currency) -> float:
+        rubles = self.cache.get(currency, self.date)
+        if rubles is not None:
+            return rubles
+        with self.cache.lock(currency, self.date):
+            # the rate could be fetched while waiting for the lock
+            rubles = self.cache.get(currency, self.date)
+            if rubles is not None:
+                return rubles
+            self.logger.info(
+                "There is no cached rate for currency %s at %s, requesting %s",
+                currency,
+                self.date,
+                type(self.repository)
+            )
+            rubles = self.repository.get_amount_of_rubles_for(currency)
+            self.cache.set(currency, self.date, rubles)
+        return rubles
@@ -5,6 +5,13 @@ class Currency(enum.Enum):
     """Enum of currencies."""
     RUBLE = 1
     DOLLAR = 2
+    EURO = 3
+    POUND = 4
+    YUAN = 5
+    YEN = 6
 
     def __eq__(self, __o: object) -> bool:
         return isinstance(__o, Currency) and self.value == __o.value
+
+    def __hash__(self) -> int:
+        return hash(self.value)
@@ -0,0 +1,29 @@
+from django.conf import settings
+
+from .rate_cache import (BaseRateCache, DatabaseRateCache,
+                         DjangoCacheRateCache, MemoryRateCache)
+
+_memory_rate_cache = None
+
+
+def get_rate_cache() -> BaseRateCache:
+    """Get the rate cache selected by `CURRENCY_RATE_CACHE` setting.
+
+    The in-process cache is shared by all calls of a worker.
+
+    Raises:
+        NotImplementedError: If there is no such cache backend
+    """
+    global _memory_rate_cache  # pylint: disable=global-statement
+    backend = settings.CURRENCY_RATE_CACHE
+    timeout = settings.CURRENCY_RATE_CACHE_TIMEOUT
+    if backend == "memory":
+        if _memory_rate_cache is None:
+            _memory_rate_cache = MemoryRateCache(timeout=timeout)
+        return _memory_rate_cache
+    if backend == "cache":
+        return DjangoCacheRateCache(timeout=timeout)
+    if backend == "database":
+        # rates of past dates never change, so they are kept as history
+        return DatabaseRateCache()
+    raise NotImplementedError(f"There is no rate cache backend: {backend}")
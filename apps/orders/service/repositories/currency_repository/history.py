@@ -0,0 +1,58 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from datetime import date
+from typing import Dict, Optional
+
+from .currencies import Currency
+
+
+class RatesHistory:
+    """In-memory index of daily rates of one currency."""
+
+    __slots__ = ("dates", "rates")
+
+    def __init__(self, rates: Dict[date, float]) -> None:
+        self.dates = sorted(rates)
+        self.rates = [rates[elem] for elem in self.dates]
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def get(self, date_: date, default: Optional[float] = None) -> Optional[float]:
+        """Get the rate in effect at the date.
+
+        That is the latest known rate on or before the date. Dates before
+        the history get the earliest known rate.
+
+        Args:
+            date_ (date): Date of the rate
+            default (Optional[float]): Value for the empty history
+
+        Returns:
+            Optional[float]: Number of rubles for one currency unit
+        """
+        if not self.dates:
+            return default
+        index = bisect_right(self.dates, date_) - 1
+        return self.rates[max(index, 0)]
+
+
+class BaseRatesHistoryRepository(ABC):
+    """Abstract class for receiving the history of the ruble exchange rate
+    relative to a currency.
+    """
+
+    def __init__(self, currency: Currency) -> None:
+        self.currency = currency
+
+    @abstractmethod
+    def get_history(self, start: date, end: date) -> RatesHistory:
+        """Get daily rates for the range of dates.
+
+        Args:
+            start (date): First date of the range
+            end (date): Last date of the range
+
+        Returns:
+            RatesHistory: Index of rates
+        """
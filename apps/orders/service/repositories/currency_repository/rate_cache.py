@@ -0,0 +1,149 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Iterator, List, Optional
+
+from apps.orders.models import CurrencyRate
+from cachetools import TTLCache
+from django.core.cache import BaseCache, caches
+from django.utils import timezone
+
+from .currencies import Currency
+
+
+class BaseRateCache(ABC):
+    """Abstract storage of exchange rates keyed by currency and date."""
+
+    # keys share a fixed number of locks, so locks don't pile up with dates
+    LOCK_STRIPES = 16
+
+    def __init__(self) -> None:
+        self._locks: List[threading.Lock] = [
+            threading.Lock() for _ in range(self.LOCK_STRIPES)
+        ]
+
+    @abstractmethod
+    def get(self, currency: Currency, date_: date) -> Optional[float]:
+        """Get the cached number of rubles for one currency unit.
+
+        Args:
+            currency (Currency): Currency
+            date_ (date): Date of the rate
+
+        Returns:
+            Optional[float]: Number of rubles, if cached, else None
+        """
+
+    @abstractmethod
+    def set(self, currency: Currency, date_: date, rubles: float) -> None:
+        """Cache the number of rubles for one currency unit.
+
+        Args:
+            currency (Currency): Currency
+            date_ (date): Date of the rate
+            rubles (float): Number of rubles
+        """
+
+    @contextmanager
+    def lock(self, currency: Currency, date_: date) -> Iterator[None]:
+        """Let only one caller at a time fetch the rate for the key.
+
+        The default lock works inside one process only.
+        """
+        key_lock = self._locks[hash((currency.name, date_)) % self.LOCK_STRIPES]
+        with key_lock:
+            yield
+
+
+class MemoryRateCache(BaseRateCache):
+    """In-process LRU cache of rates with expiration."""
+
+    def __init__(self, maxsize: int = 128, timeout: int = 86400) -> None:
+        super().__init__()
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=timeout)
+        self._cache_guard = threading.Lock()
+
+    def get(self, currency: Currency, date_: date) -> Optional[float]:
+        with self._cache_guard:
+            return self._cache.get((currency.name, date_))
+
+    def set(self, currency: Currency, date_: date, rubles: float) -> None:
+        with self._cache_guard:
+            self._cache[(currency.name, date_)] = rubles
+
+
+class DjangoCacheRateCache(BaseRateCache):
+    """Cache of rates based on django cache, i.e. Redis.
+
+    The lock is shared between all processes using the same cache.
+    """
+
+    KEY_PREFIX = "orders:rates:"
+    LOCK_POLL_INTERVAL = 0.1
+
+    def __init__(
+        self,
+        cache: Optional[BaseCache] = None,
+        timeout: int = 86400,
+        lock_timeout: int = 30,
+    ) -> None:
+        super().__init__()
+        self.cache = cache or caches["default"]
+        self.timeout = timeout
+        self.lock_timeout = lock_timeout
+
+    def get(self, currency: Currency, date_: date) -> Optional[float]:
+        return self.cache.get(self._get_key(currency, date_))
+
+    def set(self, currency: Currency, date_: date, rubles: float) -> None:
+        self.cache.set(self._get_key(currency, date_), rubles, timeout=self.timeout)
+
+    @contextmanager
+    def lock(self, currency: Currency, date_: date) -> Iterator[None]:
+        lock_key = self._get_key(currency, date_) + ":lock"
+        deadline = time.monotonic() + self.lock_timeout
+        acquired = self.cache.add(lock_key, 1, timeout=self.lock_timeout)
+        # wait until the holder of the lock fetches the rate or the lock expires
+        while not acquired and time.monotonic() < deadline:
+            if self.get(currency, date_) is not None:
+                break
+            time.sleep(self.LOCK_POLL_INTERVAL)
+            acquired = self.cache.add(lock_key, 1, timeout=self.lock_timeout)
+        try:
+            yield
+        finally:
+            if acquired:
+                self.cache.delete(lock_key)
+
+    def _get_key(self, currency: Currency, date_: date) -> str:
+        return f"{self.KEY_PREFIX}{currency.name}:{date_.isoformat()}"
+
+
+class DatabaseRateCache(BaseRateCache):
+    """Cache of rates stored in the CurrencyRate table."""
+
+    def __init__(self, timeout: Optional[int] = None) -> None:
+        super().__init__()
+        self.timeout = timeout
+
+    def get(self, currency: Currency, date_: date) -> Optional[float]:
+        rates = CurrencyRate.objects.filter(currency=currency.name, date=date_)
+        if self.timeout is not None:
+            rates = rates.filter(updated_at__gte=self._get_expiration_date())
+        return rates.values_list("rubles", flat=True).first()
+
+    def set(self, currency: Currency, date_: date, rubles: float) -> None:
+        CurrencyRate.objects.update_or_create(
+            currency=currency.name,
+            date=date_,
+            defaults={"rubles": rubles},
+        )
+        if self.timeout is not None:
+            CurrencyRate.objects.filter(
+                updated_at__lt=self._get_expiration_date()
+            ).delete()
+
+    def _get_expiration_date(self):
+        return timezone.now() - timedelta(seconds=self.timeout)
@@ -1,7 +1,9 @@
-from datetime import datetime
-from typing import Iterable
+from datetime import date, datetime, timedelta
+from typing import IO, Dict, Optional
 
 import requests
+from apps.orders.service.usecases.currency_rate import (get_currency_rates,
+                                                        save_currency_rates)
 from apps.orders.utils.logger import get_default_logger
 from lxml import etree
 
@@ -10,15 +12,28 @@ from .currencies import Currency
 from .exceptions import (BadResponseFromCurrencyAPIException,
                          MultipleCurrenciesInResponseException,
                          NoSuchCurrencyInResponseException)
+from .history import BaseRatesHistoryRepository, RatesHistory
+
+BANK_OF_RUSSIA_CODES = {
+    Currency.DOLLAR: "R01235",
+    Currency.EURO: "R01239",
+    Currency.POUND: "R01035",
+    Currency.YUAN: "R01375",
+    Currency.YEN: "R01820",
+}
 
 
 class BankOfRussiaCurrencyToRublesRepository(BaseCurrencyToRublesRepository):
     """The Bank of Russia repository for receiving the ruble exchange rate
     relative to currencies.
+
+    The daily document is requested once and all of its rates are kept,
+    so any number of currencies is looked up without further requests.
     """
 
     SUPPORTED_CURRENCIES = [
-        Currency.DOLLAR,
+        Currency.RUBLE,
+        *BANK_OF_RUSSIA_CODES.keys(),
     ]
 
     def __init__(
@@ -31,15 +46,46 @@ class BankOfRussiaCurrencyToRublesRepository(BaseCurrencyToRublesRepository):
         self.url = url
         self.date = date
         self.logger = get_default_logger("BankOfRussiaCurrencyRepository")
+        self.rates: Optional[Dict[str, float]] = None
         if self.currency not in self.SUPPORTED_CURRENCIES:
             raise NotImplementedError(
                 f"There is no implementation for currency: {self.currency.name}"
             )
 
     def get_amount_of_rubles_per_currency(self) -> float:
+        return self.get_amount_of_rubles_for(self.currency)
+
+    def get_amount_of_rubles_for(self, currency: Currency) -> float:
+        if currency == Currency.RUBLE:
+            return 1.0
+        currency_code = currency_to_bank_of_russia_code(currency)
+        self.logger.info(
+            "Found currency code: %s. For the currency: %s",
+            currency_code,
+            currency
+        )
+        rates = self.get_rates()
+        if currency_code not in rates:
+            raise NoSuchCurrencyInResponseException(
+                f"There is no currency: {currency_code} in response"
+            )
+        return rates[currency_code]
+
+    def get_rates(self) -> Dict[str, float]:
+        """Get rates of all currencies from the daily document.
+
+        The document is requested only on the first call.
+
+        Returns:
+            Dict[str, float]: Number of rubles for one currency unit
+            by the Bank of Russia currency code
+        """
+        if self.rates is not None:
+            return self.rates
         response = requests.get(
             self.url,
-            params={"date_req": self.date.strftime("%d/%m/%Y")}
+            params={"date_req": self.date.strftime("%d/%m/%Y")},
+            stream=True,
         )
         self.logger.info(
             "received response from BankOfRussia API with code: %s",
@@ -47,41 +93,148 @@ class BankOfRussiaCurrencyToRublesRepository(BaseCurrencyToRublesRepository):
         )
         if not response.status_code == 200:
             raise BadResponseFromCurrencyAPIException()
-        currency_code = currency_to_bank_of_russia_code(self.currency)
+        with response:
+            response.raw.decode_content = True
+            self.rates = parse_rates(response.raw)
+        return self.rates
+
+
+class BankOfRussiaRatesHistoryRepository(BaseRatesHistoryRepository):
+    """The Bank of Russia repository for receiving the history of the ruble
+    exchange rate relative to a currency.
+
+    Rates are stored in the database for every day, missing ranges are
+    requested from the XML_dynamic endpoint with one request per range.
+    """
+
+    # The rate in effect at the start of the range could be set a few days
+    # before it, i.e. on the last working day.
+    LOOKBACK_DAYS = 10
+
+    def __init__(self, currency: Currency, url: str) -> None:
+        super().__init__(currency)
+        self.url = url
+        self.currency_code = currency_to_bank_of_russia_code(currency)
+        self.logger = get_default_logger("BankOfRussiaRatesHistoryRepository")
+
+    def get_history(self, start: date, end: date) -> RatesHistory:
+        # there are no rates for the future yet
+        end = min(end, date.today())
+        start = min(start, end)
+        rates = get_currency_rates(self.currency.name, start, end)
+        if len(rates) <= (end - start).days:
+            self.logger.info(
+                "Rates of currency %s from %s to %s aren't stored, requesting them",
+                self.currency,
+                start,
+                end
+            )
+            rates = fill_daily_rates(self._fetch_rates(start, end), start, end)
+            save_currency_rates(self.currency.name, rates)
+        return RatesHistory(rates)
+
+    def _fetch_rates(self, start: date, end: date) -> Dict[date, float]:
+        response = requests.get(
+            self.url,
+            params={
+                "date_req1": (start - timedelta(days=self.LOOKBACK_DAYS)).strftime("%d/%m/%Y"),
+                "date_req2": end.strftime("%d/%m/%Y"),
+                "VAL_NM_RQ": self.currency_code,
+            },
+            stream=True,
+        )
         self.logger.info(
-            "Found currency code: %s. For the currency: %s",
-            currency_code,
-            self.currency
+            "received response from BankOfRussia API with code: %s",
+            response.status_code
         )
-        return self._get_value_from_response_by_code(response.text, currency_code)
+        if not response.status_code == 200:
+            raise BadResponseFromCurrencyAPIException()
+        with response:
+            response.raw.decode_content = True
+            return parse_dynamic_rates(response.raw)
 
-    def _get_value_from_response_by_code(self, xml_body: str, currency_code: str) -> float:
-        root: etree._Element = etree.fromstring(
-            bytes(xml_body, encoding="windows-1251")
-        )
-        # Get all valute elements from root elem
-        valute_elements: Iterable[etree._Element] = root.findall("Valute")
-        # Find the valute by code
-        single_valute_element = tuple(filter(
-            lambda el: el.get("ID") == currency_code,
-            valute_elements
-        ))
-        # If there are no elements in collection, raise exception
-        if len(single_valute_element) == 0:
-            raise NoSuchCurrencyInResponseException(
-                f"There is no currency: {currency_code} in response"
-            )
-        # If there are more, than one element in collection, raise exception
-        if len(single_valute_element) > 1:
+
+def parse_rates(source: IO[bytes]) -> Dict[str, float]:
+    """Parse the XML_daily document of the Bank of Russia in one pass.
+
+    Args:
+        source (IO[bytes]): Stream with the document
+
+    Raises:
+        MultipleCurrenciesInResponseException: If the currency occurs twice
+
+    Returns:
+        Dict[str, float]: Number of rubles for one currency unit
+        by the Bank of Russia currency code
+    """
+    rates: Dict[str, float] = {}
+    for _, element in etree.iterparse(source, events=("end",), tag="Valute"):
+        currency_code = element.get("ID")
+        if currency_code in rates:
             raise MultipleCurrenciesInResponseException(
                 f"There are more than one currency: {currency_code} in response"
             )
-        # Take the only element from collection
-        single_valute_element: etree._Element = single_valute_element[0]
-        # Take it's value and then parse it to a float type
-        value_element: etree._Element = single_valute_element.find("Value")
-        string_value = value_element.text
-        return float(string_value.replace(",", "."))
+        rates[currency_code] = parse_decimal(element.findtext("Value")) / \
+            parse_decimal(element.findtext("Nominal"))
+        # free the parsed elements, the rest of the document isn't needed
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+    return rates
+
+
+def parse_dynamic_rates(source: IO[bytes]) -> Dict[date, float]:
+    """Parse the XML_dynamic document of the Bank of Russia in one pass.
+
+    Args:
+        source (IO[bytes]): Stream with the document
+
+    Returns:
+        Dict[date, float]: Number of rubles for one currency unit by the date
+        the rate was set at
+    """
+    rates: Dict[date, float] = {}
+    for _, element in etree.iterparse(source, events=("end",), tag="Record"):
+        date_ = datetime.strptime(element.get("Date"), "%d.%m.%Y").date()
+        rates[date_] = parse_decimal(element.findtext("Value")) / \
+            parse_decimal(element.findtext("Nominal"))
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+    return rates
+
+
+def fill_daily_rates(
+    rates: Dict[date, float],
+    start: date,
+    end: date
+) -> Dict[date, float]:
+    """Get the rate in effect for every day of the range.
+
+    The rate isn't set on weekends and holidays, so such days get
+    the latest rate set before them.
+
+    Args:
+        rates (Dict[date, float]): Rates by the date they were set at
+        start (date): First date of the range
+        end (date): Last date of the range
+
+    Returns:
+        Dict[date, float]: Rates by day
+    """
+    history = RatesHistory(rates)
+    result: Dict[date, float] = {}
+    day = start
+    while day <= end:
+        if history.dates and history.dates[0] <= day:
+            result[day] = history.get(day)
+        day += timedelta(days=1)
+    return result
+
+
+def parse_decimal(value: str) -> float:
+    """Parse the number with a decimal comma to float."""
+    return float(value.replace(",", "."))
 
 
 def currency_to_bank_of_russia_code(currency: Currency) -> str:
@@ -96,8 +249,8 @@ def currency_to_bank_of_russia_code(currency: Currency) -> str:
     Returns:
         str: The code of currency
     """
-    if currency == Currency.DOLLAR:
-        return "R01235"
+    if currency in BANK_OF_RUSSIA_CODES:
+        return BANK_OF_RUSSIA_CODES[currency]
     raise NotImplementedError(
         f"There is no implementation for currency: {currency.name}"
     )
@@ -0,0 +1,2 @@
+from .base import BaseSyncStateRepository
+from .cache import CacheSyncStateRepository
@@ -0,0 +1,39 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class BaseSyncStateRepository(ABC):
+    """Abstract class for storing the state of orders synchronization
+    between parser runs.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Get the stored value by key.
+
+        Args:
+            key (str): Key of the value
+
+        Returns:
+            Optional[str]: Stored value, if exist, else None
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        """Store the value by key.
+
+        Args:
+            key (str): Key of the value
+            value (str): Value to store
+        """
+
+    @abstractmethod
+    def increment(self, key: str) -> int:
+        """Increment the counter by key.
+
+        Args:
+            key (str): Key of the counter
+
+        Returns:
+            int: Value of the counter after increment
+        """
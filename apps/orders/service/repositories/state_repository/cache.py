@@ -0,0 +1,34 @@
+from typing import Optional
+
+from django.core.cache import BaseCache, caches
+
+from .base import BaseSyncStateRepository
+
+
+class CacheSyncStateRepository(BaseSyncStateRepository):
+    """Repository for the synchronization state based on django cache.
+
+    Uses Redis in production and in-process memory when there is no
+    Redis configured.
+    """
+
+    KEY_PREFIX = "orders:sync:"
+
+    def __init__(
+        self,
+        cache: Optional[BaseCache] = None,
+        timeout: Optional[int] = None,
+    ) -> None:
+        self.cache = cache or caches["default"]
+        self.timeout = timeout
+
+    def get(self, key: str) -> Optional[str]:
+        return self.cache.get(self.KEY_PREFIX + key)
+
+    def set(self, key: str, value: str) -> None:
+        self.cache.set(self.KEY_PREFIX + key, value, timeout=self.timeout)
+
+    def increment(self, key: str) -> int:
+        full_key = self.KEY_PREFIX + key
+        self.cache.add(full_key, 0, timeout=None)
+        return self.cache.incr(full_key)
@@ -0,0 +1,5 @@
+from .base import BaseOrdersSynchronizer, SyncResult
+from .change_set import OrdersChangeSet
+from .bulk import BulkOrdersSynchronizer
+from .postgres import PostgresCopyOrdersSynchronizer
+from .factory import get_orders_synchronizer
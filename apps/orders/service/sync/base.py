@@ -0,0 +1,37 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from .change_set import OrdersChangeSet
+
+if TYPE_CHECKING:
+    from apps.orders.service.parse.google_sheets_parser import GoogleSheetRow
+
+
+@dataclass
+class SyncResult:
+    """Summary of a single synchronization of orders."""
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    # the greatest explicit id among created orders, None if nothing was created
+    max_created_id: Optional[int] = None
+    changes: OrdersChangeSet = field(default_factory=OrdersChangeSet)
+
+
+class BaseOrdersSynchronizer(ABC):
+    """Abstract class for writers of parsed rows into the Order table."""
+
+    @abstractmethod
+    def sync(self, rows: Iterable['GoogleSheetRow']) -> SyncResult:
+        """Create or update orders from rows and delete orders
+        that are not presented in rows.
+
+        Args:
+            rows (Iterable[GoogleSheetRow]): Parsed rows
+
+        Returns:
+            SyncResult: Number of created, updated, unchanged and deleted orders
+            and their ids
+        """
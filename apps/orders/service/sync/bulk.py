@@ -0,0 +1,169 @@
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+from apps.orders.models import Order
+from apps.orders.service.parse.row_batch import RowBatch
+from apps.orders.service.usecases.order import (ORDER_SYNC_FIELDS,
+                                                bulk_create_orders,
+                                                bulk_update_orders,
+                                                delete_orders_by_ids,
+                                                get_ids_queries,
+                                                get_orders_snapshot,
+                                                soft_delete_orders_by_ids,
+                                                upsert_orders)
+from apps.orders.utils.iter_utils import chunked
+from apps.orders.utils.logger import get_default_logger
+from django.db import connection, transaction
+
+from .base import BaseOrdersSynchronizer, SyncResult
+
+if TYPE_CHECKING:
+    from apps.orders.service.parse.google_sheets_parser import GoogleSheetRow
+
+
+class BulkOrdersSynchronizer(BaseOrdersSynchronizer):
+    """Set-based synchronizer.
+
+    Consumes rows by chunks, skips unchanged rows and writes the rest
+    with bulk queries. On PostgreSQL new and changed rows are written by
+    a single `INSERT ... ON CONFLICT` per chunk.
+
+    The state of all orders is loaded with one query for a RowBatch,
+    which is in memory anyway. Lazily fetched rows are compared with the
+    orders of their chunk only, and their ids are kept in a temporary
+    table, so memory doesn't grow with the number of orders.
+    """
+
+    SEEN_IDS_TABLE = "orders_sync_seen_ids"
+
+    def __init__(self, batch_size: int = 1000, soft_delete: bool = False) -> None:
+        self.batch_size = batch_size
+        # if set, missing orders are marked as deleted and restored when they come back
+        self.soft_delete = soft_delete
+        self.logger = get_default_logger("BulkOrdersSynchronizer")
+
+    def sync(self, rows: Iterable['GoogleSheetRow']) -> SyncResult:
+        result = SyncResult()
+        with transaction.atomic():
+            if isinstance(rows, RowBatch):
+                rows_count = self._sync_batch(rows, result)
+            else:
+                rows_count = self._sync_stream(rows, result)
+        self.logger.info(
+            "Synchronized %s rows: %s created, %s updated, %s unchanged, %s deleted",
+            rows_count,
+            result.created,
+            result.updated,
+            result.unchanged,
+            result.deleted
+        )
+        return result
+
+    def _sync_batch(self, rows: RowBatch, result: SyncResult) -> int:
+        snapshot = get_orders_snapshot()
+        for chunk in rows.chunks(self.batch_size):
+            self._sync_chunk(chunk, snapshot, result)
+        if self.soft_delete:
+            missing_ids = [
+                id_ for id_, state in snapshot.items()
+                if state is not None and id_ not in rows
+            ]
+        else:
+            missing_ids = [id_ for id_ in snapshot if id_ not in rows]
+        self._delete_missing_orders(missing_ids, result)
+        return len(rows)
+
+    def _sync_stream(self, rows: Iterable['GoogleSheetRow'], result: SyncResult) -> int:
+        quote_name = connection.ops.quote_name
+        seen_ids = quote_name(self.SEEN_IDS_TABLE)
+        table = quote_name(Order._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {seen_ids}")
+            cursor.execute(f"CREATE TEMPORARY TABLE {seen_ids} (id BIGINT PRIMARY KEY)")
+            try:
+                for chunk in chunked(rows, self.batch_size):
+                    ids = list({row.id: None for row in chunk})
+                    self._sync_chunk(chunk, get_orders_snapshot(ids), result)
+                    for ids_query, params in get_ids_queries(ids, self.batch_size):
+                        cursor.execute(
+                            f"INSERT INTO {seen_ids} (id) {ids_query} ON CONFLICT DO NOTHING",
+                            params
+                        )
+                live_only = f"AND {quote_name('deleted_at')} IS NULL" if self.soft_delete else ""
+                cursor.execute(
+                    f"SELECT {quote_name('id')} FROM {table} WHERE NOT EXISTS " +
+                    f"(SELECT 1 FROM {seen_ids} " +
+                    f"WHERE {seen_ids}.id = {table}.{quote_name('id')}) " +
+                    live_only
+                )
+                missing_ids = [id_ for id_, in cursor.fetchall()]
+                cursor.execute(f"SELECT COUNT(*) FROM {seen_ids}")
+                rows_count, = cursor.fetchone()
+            finally:
+                cursor.execute(f"DROP TABLE IF EXISTS {seen_ids}")
+        self._delete_missing_orders(missing_ids, result)
+        return rows_count
+
+    def _sync_chunk(
+        self,
+        chunk: Iterable['GoogleSheetRow'],
+        snapshot: Dict[int, Optional[tuple]],
+        result: SyncResult
+    ) -> None:
+        to_create: List[Order] = []
+        to_update: List[Order] = []
+        # the last row wins if the sheet contains duplicated ids
+        states = {row.id: map_row_to_state(row) for row in chunk}
+        for id_, state in states.items():
+            if id_ not in snapshot:
+                to_create.append(map_state_to_model(id_, state))
+                result.changes.created.append(id_)
+            elif snapshot[id_] != state:
+                to_update.append(map_state_to_model(id_, state))
+                result.changes.updated[id_] = get_changed_fields(snapshot[id_], state)
+            else:
+                result.unchanged += 1
+            snapshot[id_] = state
+        result.created += len(to_create)
+        if to_create:
+            result.max_created_id = max(
+                max(order.id for order in to_create),
+                result.max_created_id or 0
+            )
+        result.updated += len(to_update)
+        if connection.vendor == "postgresql":
+            upsert_orders(to_create + to_update, self.batch_size)
+        else:
+            bulk_create_orders(to_create, self.batch_size)
+            bulk_update_orders(to_update, self.batch_size)
+
+    def _delete_missing_orders(self, missing_ids: List[int], result: SyncResult) -> None:
+        # remove orders that are not presented in current data
+        delete_orders = soft_delete_orders_by_ids if self.soft_delete else delete_orders_by_ids
+        result.deleted = delete_orders(missing_ids, self.batch_size)
+        result.changes.deleted = missing_ids
+        if result.deleted:
+            self.logger.warning("Deleted %s orders missing from the sheet", result.deleted)
+
+
+def map_row_to_state(row: 'GoogleSheetRow') -> tuple:
+    """Get the values of synchronized fields from row."""
+    return tuple(getattr(row, field) for field in ORDER_SYNC_FIELDS)
+
+
+def get_changed_fields(old_state: Optional[tuple], new_state: tuple) -> List[str]:
+    """Get names of synchronized fields which differ between states.
+
+    All fields are changed if the order was soft-deleted, as well as `deleted_at`.
+    """
+    if old_state is None:
+        return list(ORDER_SYNC_FIELDS) + ["deleted_at"]
+    return [
+        field
+        for field, old_value, new_value in zip(ORDER_SYNC_FIELDS, old_state, new_state)
+        if old_value != new_value
+    ]
+
+
+def map_state_to_model(id_: int, state: tuple) -> Order:
+    """Build Order object from id and values of synchronized fields."""
+    return Order(id=id_, **dict(zip(ORDER_SYNC_FIELDS, state)))
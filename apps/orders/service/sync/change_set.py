@@ -0,0 +1,49 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List
+
+
+@dataclass
+class OrdersChangeSet:
+    """Ids of orders changed by a single synchronization.
+
+    Updated orders are mapped to the names of their changed fields,
+    `deleted_at` means that the order was restored.
+    """
+    created: List[int] = field(default_factory=list)
+    updated: Dict[int, List[str]] = field(default_factory=dict)
+    deleted: List[int] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.created) + len(self.updated) + len(self.deleted)
+
+    def iter_changed_ids(self, *fields: str) -> Iterator[int]:
+        """Iterate over ids of created orders and updated ones.
+
+        Args:
+            *fields (str): If given, only orders with some of these fields
+                changed are taken from the updated ones
+
+        Returns:
+            Iterator[int]: Ids of orders
+        """
+        yield from self.created
+        for id_, changed_fields in self.updated.items():
+            if not fields or any(name in changed_fields for name in fields):
+                yield id_
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the JSON-serializable representation, i.e. for task arguments."""
+        return {
+            "created": self.created,
+            "updated": {str(id_): fields for id_, fields in self.updated.items()},
+            "deleted": self.deleted,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'OrdersChangeSet':
+        """Restore the change set from the result of `to_dict`."""
+        return cls(
+            created=list(data["created"]),
+            updated={int(id_): list(fields) for id_, fields in data["updated"].items()},
+            deleted=list(data["deleted"]),
+        )
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db import connection
+
+from .base import BaseOrdersSynchronizer
+from .bulk import BulkOrdersSynchronizer
+from .postgres import PostgresCopyOrdersSynchronizer
+
+
+def get_orders_synchronizer() -> BaseOrdersSynchronizer:
+    """Get the synchronizer selected by `ORDERS_SYNC_BACKEND` setting.
+
+    `COPY` works only with PostgreSQL, other databases use bulk ORM queries.
+
+    Raises:
+        NotImplementedError: If there is no such synchronizer
+    """
+    backend = settings.ORDERS_SYNC_BACKEND
+    if backend == "copy" and connection.vendor == "postgresql":
+        return PostgresCopyOrdersSynchronizer(soft_delete=settings.ORDERS_SOFT_DELETE)
+    if backend in ("copy", "bulk"):
+        return BulkOrdersSynchronizer(
+            batch_size=settings.ORDERS_SYNC_BATCH_SIZE,
+            soft_delete=settings.ORDERS_SOFT_DELETE
+        )
+    raise NotImplementedError(f"There is no orders sync backend: {backend}")
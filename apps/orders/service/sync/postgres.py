@@ -0,0 +1,171 @@
+from io import TextIOBase
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+
+from apps.orders.models import Order
+from apps.orders.service.usecases.order import (ORDER_SYNC_FIELDS,
+                                                delete_orders_by_ids,
+                                                soft_delete_orders_by_ids)
+from apps.orders.utils.logger import get_default_logger
+from django.db import connection, transaction
+
+from .base import BaseOrdersSynchronizer, SyncResult
+from .change_set import OrdersChangeSet
+
+if TYPE_CHECKING:
+    from apps.orders.service.parse.google_sheets_parser import GoogleSheetRow
+
+
+class PostgresCopyOrdersSynchronizer(BaseOrdersSynchronizer):
+    """Synchronizer for very large sheets, works only with PostgreSQL.
+
+    Rows are streamed into a temporary staging table with `COPY FROM STDIN`
+    and then merged into the Order table with set-based queries
+    inside one transaction.
+    """
+
+    STAGING_TABLE = "orders_order_staging"
+
+    def __init__(self, soft_delete: bool = False) -> None:
+        # if set, missing orders are marked as deleted and restored when they come back
+        self.soft_delete = soft_delete
+        self.logger = get_default_logger("PostgresCopyOrdersSynchronizer")
+
+    def sync(self, rows: Iterable['GoogleSheetRow']) -> SyncResult:
+        quote_name = connection.ops.quote_name
+        staging = quote_name(self.STAGING_TABLE)
+        table = quote_name(Order._meta.db_table)
+        columns = ", ".join(map(quote_name, ("id",) + ORDER_SYNC_FIELDS))
+        with transaction.atomic(), connection.cursor() as cursor:
+            # position keeps the order of rows, so the last duplicated row wins
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {staging} (" +
+                "position BIGSERIAL, id BIGINT, order_id VARCHAR(200), " +
+                "cost_dollars DOUBLE PRECISION, cost_rubles DOUBLE PRECISION, " +
+                "delivery_date DATE) ON COMMIT DROP"
+            )
+            cursor.copy_expert(
+                f"COPY {staging} ({columns}) FROM STDIN",
+                RowsCopyFile(rows)
+            )
+            cursor.execute(f"CREATE INDEX ON {staging} (id)")
+            cursor.execute(f"ANALYZE {staging}")
+            cursor.execute(f"SELECT COUNT(DISTINCT id) FROM {staging}")
+            rows_count, = cursor.fetchone()
+            assignments = ", ".join(
+                f"{quote_name(field)} = EXCLUDED.{quote_name(field)}"
+                for field in ORDER_SYNC_FIELDS
+            ) + f", {quote_name('deleted_at')} = NULL"
+            current = ", ".join(
+                f"{table}.{quote_name(field)}"
+                for field in ORDER_SYNC_FIELDS + ("deleted_at",)
+            )
+            excluded = ", ".join(
+                f"EXCLUDED.{quote_name(field)}" for field in ORDER_SYNC_FIELDS
+            ) + ", NULL::timestamptz"
+            changed_fields = ", ".join(
+                f"CASE WHEN {table}.{quote_name(field)} IS DISTINCT FROM " +
+                f"source.{quote_name(field)} THEN '{field}' END"
+                for field in ORDER_SYNC_FIELDS
+            ) + f", CASE WHEN {table}.{quote_name('deleted_at')} IS NOT NULL " + \
+                "THEN 'deleted_at' END"
+            # changed fields are compared with the rows before the merge,
+            # since all parts of the query see the same snapshot
+            cursor.execute(
+                f"WITH source AS (SELECT DISTINCT ON (id) {columns} FROM {staging} " +
+                "ORDER BY id, position DESC), " +
+                f"changed AS (SELECT source.id, ARRAY_REMOVE(ARRAY[{changed_fields}], NULL) " +
+                f"AS fields FROM source JOIN {table} ON {table}.{quote_name('id')} = source.id), " +
+                f"merged AS (INSERT INTO {table} ({columns}) SELECT {columns} FROM source " +
+                f"ON CONFLICT ({quote_name('id')}) DO UPDATE SET {assignments} " +
+                f"WHERE ({current}) IS DISTINCT FROM ({excluded}) " +
+                "RETURNING id, xmax = 0 AS inserted) " +
+                "SELECT merged.id, merged.inserted, changed.fields " +
+                "FROM merged LEFT JOIN changed ON changed.id = merged.id"
+            )
+            changes = OrdersChangeSet()
+            for id_, inserted, fields in cursor:
+                if inserted:
+                    changes.created.append(id_)
+                else:
+                    changes.updated[id_] = fields
+            live_only = f"AND {quote_name('deleted_at')} IS NULL " if self.soft_delete else ""
+            cursor.execute(
+                f"SELECT {quote_name('id')} FROM {table} WHERE NOT EXISTS " +
+                f"(SELECT 1 FROM {staging} WHERE {staging}.id = {table}.{quote_name('id')}) " +
+                live_only
+            )
+            changes.deleted = [id_ for id_, in cursor]
+            delete_orders = soft_delete_orders_by_ids if self.soft_delete \
+                else delete_orders_by_ids
+            deleted = delete_orders(changes.deleted)
+        result = SyncResult(
+            created=len(changes.created),
+            updated=len(changes.updated),
+            unchanged=rows_count - len(changes.created) - len(changes.updated),
+            deleted=deleted,
+            max_created_id=max(changes.created, default=None),
+            changes=changes,
+        )
+        self.logger.info(
+            "Synchronized %s rows: %s created, %s updated, %s unchanged, %s deleted",
+            rows_count,
+            result.created,
+            result.updated,
+            result.unchanged,
+            result.deleted
+        )
+        return result
+
+
+class RowsCopyFile(TextIOBase):
+    """Read-only file of rows in the text format of `COPY`.
+
+    Rows are rendered lazily, while the file is read.
+    """
+
+    def __init__(self, rows: Iterable['GoogleSheetRow']) -> None:
+        super().__init__()
+        self._lines: Iterator[str] = map(to_copy_line, rows)
+        self._buffer = ""
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: Optional[int] = -1) -> str:
+        if size is None or size < 0:
+            result = self._buffer + "".join(self._lines)
+            self._buffer = ""
+            return result
+        while len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+        result, self._buffer = self._buffer[:size], self._buffer[size:]
+        return result
+
+    def readline(self, size: Optional[int] = -1) -> str:
+        if self._buffer:
+            line, self._buffer = self._buffer, ""
+            return line
+        return next(self._lines, "")
+
+
+def to_copy_line(row: 'GoogleSheetRow') -> str:
+    """Render the row as a line of the `COPY` text format."""
+    values = (
+        str(row.id),
+        escape_copy_value(row.order_id),
+        repr(row.cost_dollars),
+        repr(row.cost_rubles),
+        row.delivery_date.isoformat(),
+    )
+    return "\t".join(values) + "\n"
+
+
+def escape_copy_value(value: str) -> str:
+    """Escape special characters of the `COPY` text format."""
+    return value.replace("\\", "\\\\") \
+        .replace("\t", "\\t") \
+        .replace("\n", "\\n") \
+        .replace("\r", "\\r")
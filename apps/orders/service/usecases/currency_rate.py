@@ -0,0 +1,38 @@
+from datetime import date
+from typing import Dict
+
+from apps.orders.models import CurrencyRate
+
+
+def get_currency_rates(currency: str, start: date, end: date) -> Dict[date, float]:
+    """Get stored rates of the currency for the range of dates.
+
+    Args:
+        currency (str): Name of the currency
+        start (date): First date of the range
+        end (date): Last date of the range
+
+    Returns:
+        Dict[date, float]: Number of rubles for one currency unit by date
+    """
+    rates = CurrencyRate.objects.filter(
+        currency=currency,
+        date__range=(start, end),
+    ).values_list("date", "rubles")
+    return dict(rates)
+
+
+def save_currency_rates(currency: str, rates: Dict[date, float]) -> None:
+    """Store rates of the currency, keeping the already stored ones.
+
+    Args:
+        currency (str): Name of the currency
+        rates (Dict[date, float]): Number of rubles for one currency unit by date
+    """
+    CurrencyRate.objects.bulk_create(
+        [
+            CurrencyRate(currency=currency, date=date_, rubles=rubles)
+            for date_, rubles in rates.items()
+        ],
+        ignore_conflicts=True,
+    )
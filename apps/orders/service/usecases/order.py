@@ -1,7 +1,16 @@
-from typing import Optional
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
 
 from apps.orders.models import Order
-from django.db.models import QuerySet
+from apps.orders.utils.iter_utils import chunked
+from django.db import connection, transaction
+from django.db.models import (CASCADE, DecimalField, F, FloatField, QuerySet,
+                              Value)
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
+
+# Fields which are filled from the parsed data, except the primary key.
+ORDER_SYNC_FIELDS = ("order_id", "cost_dollars", "cost_rubles", "delivery_date")
 
 
 def get_order_by_id(id_: int) -> Optional[Order]:
@@ -14,15 +23,251 @@ def get_order_by_id(id_: int) -> Optional[Order]:
         Optional[Order]: Order object, if exist, else None
     """
     try:
-        return Order.objects.get(id=id_)
+        return get_all_orders().get(id=id_)
     except Order.DoesNotExist:
         return None
 
 
 def get_all_orders() -> QuerySet[Order]:
-    """Get all orders
+    """Get all orders, except deleted ones
 
     Returns:
         QuerySet[Order]: QuerySet of Order objects
     """
-    return Order.objects.all()
+    return Order.objects.filter(deleted_at__isnull=True)
+
+
+def get_orders_snapshot(ids: Optional[Iterable[int]] = None) -> Dict[int, Optional[tuple]]:
+    """Get values of synchronized fields of orders.
+
+    Args:
+        ids (Optional[Iterable[int]]): If given, only these orders are loaded,
+            by chunks within the limit of query parameters
+
+    Returns:
+        Dict[int, Optional[tuple]]: Values of `ORDER_SYNC_FIELDS` by order id,
+        None for soft-deleted orders
+    """
+    values = Order.objects.values_list("id", "deleted_at", *ORDER_SYNC_FIELDS)
+    if ids is None:
+        querysets = [values]
+    else:
+        batch_size = connection.features.max_query_params or 1000
+        querysets = (values.filter(id__in=chunk) for chunk in chunked(ids, batch_size))
+    return {
+        id_: None if deleted_at is not None else tuple(state)
+        for queryset in querysets
+        for id_, deleted_at, *state in queryset.iterator()
+    }
+
+
+def bulk_create_orders(orders: Sequence[Order], batch_size: int) -> None:
+    """Insert orders with explicit ids by chunks."""
+    Order.objects.bulk_create(orders, batch_size=batch_size)
+
+
+def bulk_update_orders(orders: Sequence[Order], batch_size: int) -> None:
+    """Update synchronized fields of orders by chunks, restoring deleted ones."""
+    Order.objects.bulk_update(
+        orders,
+        ORDER_SYNC_FIELDS + ("deleted_at",),
+        batch_size=batch_size
+    )
+
+
+def upsert_orders(orders: Sequence[Order], batch_size: int) -> None:
+    """Insert or update orders by chunks with `INSERT ... ON CONFLICT`.
+
+    Updated orders are restored if they were soft-deleted.
+    Works only with PostgreSQL.
+    """
+    quote_name = connection.ops.quote_name
+    columns = ("id",) + ORDER_SYNC_FIELDS
+    row_placeholder = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    sql = "INSERT INTO {table} ({columns}) VALUES {values} " + \
+        "ON CONFLICT ({pk}) DO UPDATE SET {assignments}"
+    assignments = ", ".join(
+        f"{quote_name(field)} = EXCLUDED.{quote_name(field)}"
+        for field in ORDER_SYNC_FIELDS
+    ) + f", {quote_name('deleted_at')} = NULL"
+    with connection.cursor() as cursor:
+        for chunk in chunked(orders, batch_size):
+            params = []
+            for order in chunk:
+                params.extend(getattr(order, column) for column in columns)
+            cursor.execute(
+                sql.format(
+                    table=quote_name(Order._meta.db_table),
+                    columns=", ".join(map(quote_name, columns)),
+                    values=", ".join([row_placeholder] * len(chunk)),
+                    pk=quote_name("id"),
+                    assignments=assignments,
+                ),
+                params
+            )
+
+
+def reprice_orders(rubles_per_dollar: float) -> int:
+    """Recalculate costs in rubles of all orders with one UPDATE query.
+
+    Args:
+        rubles_per_dollar (float): Number of rubles per one dollar
+
+    Returns:
+        int: Number of updated orders
+    """
+    # ROUND with precision is defined only for NUMERIC in PostgreSQL,
+    # costs of parsed rows are rounded the same way by `round_cost`
+    cost_rubles = Cast(
+        Round(
+            Cast(
+                F("cost_dollars") * Value(rubles_per_dollar),
+                DecimalField(max_digits=30, decimal_places=10)
+            ),
+            2
+        ),
+        FloatField()
+    )
+    return get_all_orders().exclude(cost_rubles=cost_rubles).update(cost_rubles=cost_rubles)
+
+
+def delete_orders_by_query(ids_query: str, params: Sequence = ()) -> int:
+    """Delete orders and their cascade relations with plain DELETE queries.
+
+    Unlike `QuerySet.delete` it doesn't load deleted objects into memory.
+
+    Args:
+        ids_query (str): SQL query selecting ids of orders to delete
+        params (Sequence): Parameters of the query
+
+    Returns:
+        int: Number of deleted orders
+    """
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for relation in Order._meta.related_objects:
+            if relation.on_delete is not CASCADE:
+                continue
+            cursor.execute(
+                f"DELETE FROM {quote_name(relation.related_model._meta.db_table)} " +
+                f"WHERE {quote_name(relation.field.column)} IN ({ids_query})",
+                params
+            )
+        cursor.execute(
+            f"DELETE FROM {quote_name(Order._meta.db_table)} " +
+            f"WHERE {quote_name('id')} IN ({ids_query})",
+            params
+        )
+        return cursor.rowcount
+
+
+def delete_orders_by_ids(ids: Sequence[int], batch_size: int = 1000) -> int:
+    """Delete orders with the ids and their cascade relations.
+
+    On PostgreSQL the ids are passed as one array parameter, so every
+    table is cleaned by a single query. Elsewhere ids are deleted by chunks
+    to stay within the limit of query parameters.
+
+    Args:
+        ids (Sequence[int]): Ids of orders to delete
+        batch_size (int): Max number of ids in one query
+
+    Returns:
+        int: Number of deleted orders
+    """
+    return sum(
+        delete_orders_by_query(ids_query, params)
+        for ids_query, params in get_ids_queries(ids, batch_size)
+    )
+
+
+def soft_delete_orders_by_query(
+    ids_query: str,
+    params: Sequence = (),
+    deleted_at: Optional[datetime] = None
+) -> int:
+    """Mark live orders as deleted with one UPDATE query.
+
+    Notifications of soft-deleted orders are kept, so restored orders
+    aren't notified again.
+
+    Args:
+        ids_query (str): SQL query selecting ids of orders to delete
+        params (Sequence): Parameters of the query
+        deleted_at (Optional[datetime]): Time of deletion, now by default
+
+    Returns:
+        int: Number of deleted orders
+    """
+    if deleted_at is None:
+        deleted_at = timezone.now()
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {quote_name(Order._meta.db_table)} " +
+            f"SET {quote_name('deleted_at')} = %s " +
+            f"WHERE {quote_name('deleted_at')} IS NULL " +
+            f"AND {quote_name('id')} IN ({ids_query})",
+            [connection.ops.adapt_datetimefield_value(deleted_at), *params]
+        )
+        return cursor.rowcount
+
+
+def soft_delete_orders_by_ids(ids: Sequence[int], batch_size: int = 1000) -> int:
+    """Mark live orders with the ids as deleted.
+
+    Args:
+        ids (Sequence[int]): Ids of orders to delete
+        batch_size (int): Max number of ids in one query
+
+    Returns:
+        int: Number of deleted orders
+    """
+    deleted_at = timezone.now()
+    return sum(
+        soft_delete_orders_by_query(ids_query, params, deleted_at)
+        for ids_query, params in get_ids_queries(ids, batch_size)
+    )
+
+
+def purge_deleted_orders(deleted_before: datetime) -> int:
+    """Delete orders soft-deleted before the time and their cascade relations.
+
+    The orders are locked with `SELECT ... FOR UPDATE` in one transaction,
+    so an order restored by a concurrent synchronization keeps its
+    notifications and every table is cleaned of the same orders.
+
+    Args:
+        deleted_before (datetime): Time limit
+
+    Returns:
+        int: Number of deleted orders
+    """
+    with transaction.atomic():
+        ids = list(
+            Order.objects.select_for_update()
+            .filter(deleted_at__lt=deleted_before)
+            .values_list("id", flat=True)
+        )
+        return delete_orders_by_ids(ids)
+
+
+def get_ids_queries(
+    ids: Sequence[int],
+    batch_size: int
+) -> Iterator[Tuple[str, Sequence]]:
+    """Get SQL queries selecting the ids, with their parameters.
+
+    On PostgreSQL there is a single query with the ids as one array
+    parameter, elsewhere there is a query per chunk of ids.
+    """
+    if not ids:
+        return
+    if connection.vendor == "postgresql":
+        yield "SELECT unnest(%s::bigint[])", [list(ids)]
+        return
+    max_query_params = connection.features.max_query_params
+    if max_query_params is not None:
+        batch_size = min(batch_size, max_query_params - 1)
+    for chunk in chunked(ids, batch_size):
+        yield "VALUES " + ", ".join(["(%s)"] * len(chunk)), chunk
@@ -1 +1,2 @@
 from .parse_orders import ParseOrdersTask
+from .purge_deleted_orders import PurgeDeletedOrdersTask
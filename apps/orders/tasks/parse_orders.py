@@ -1,16 +1,28 @@
 from datetime import datetime
+from typing import Optional
 
+from apps.feedback.service.order import NOTIFIED_ORDER_FIELDS
 from apps.feedback.tasks.send_notifications_task import SendNotificationsTask
 from apps.orders.service.parse.google_sheets_parser import GoogleSheetsParser
+from apps.orders.service.parse.sheets_client import clear_cached_clients
+from apps.orders.service.repositories.currency_repository.cached_repository import \
+    CachedCurrencyToRublesRepository
 from apps.orders.service.repositories.currency_repository.currencies import \
     Currency
 from apps.orders.service.repositories.currency_repository.exceptions import (
     BadResponseFromCurrencyAPIException, MultipleCurrenciesInResponseException,
     NoSuchCurrencyInResponseException)
-from apps.orders.service.repositories.currency_repository.repository import \
-    BankOfRussiaCurrencyToRublesRepository
+from apps.orders.service.repositories.currency_repository.factory import \
+    get_rate_cache
+from apps.orders.service.repositories.currency_repository.repository import (
+    BankOfRussiaCurrencyToRublesRepository, BankOfRussiaRatesHistoryRepository)
+from apps.orders.service.repositories.state_repository.cache import \
+    CacheSyncStateRepository
+from apps.orders.service.sync.change_set import OrdersChangeSet
+from apps.orders.service.sync.factory import get_orders_synchronizer
 from apps.orders.utils.logger import get_default_logger
 from celery import Task
+from celery.signals import worker_process_init
 from django.conf import settings
 from httplib2.error import ServerNotFoundError
 from project import celery_app
@@ -26,25 +38,59 @@ class ParseOrdersTask(Task):
         self.logger = get_default_logger("ParseOrdersTask")
 
     def run(self, *args, **kwargs):
-        self.run_parser()
+        changes = self.run_parser()
+        if changes is None:
+            # nothing was written, the periodic full run sends what is due
+            return
+        notified_ids = list(changes.iter_changed_ids(*NOTIFIED_ORDER_FIELDS))
+        if not notified_ids:
+            # i.e. only costs have changed, due orders are notified
+            # at their delivery date by the scheduled run
+            return
         send_notifications_task = SendNotificationsTask()
-        send_notifications_task.delay()
+        if len(notified_ids) > settings.NOTIFICATIONS_MAX_CHANGED_ORDERS:
+            send_notifications_task.delay()
+        else:
+            send_notifications_task.delay(changes=changes.to_dict())
 
-    def run_parser(self) -> None:
+    def run_parser(self) -> Optional[OrdersChangeSet]:
+        """Synchronize orders with the sheet.
+
+        Returns:
+            Optional[OrdersChangeSet]: Changed orders, None if the parser failed
+        """
         self.logger.info("Launching the parser...")
         try:
-            repository = BankOfRussiaCurrencyToRublesRepository(
-                currency=Currency.DOLLAR,
-                url="https://www.cbr.ru/scripts/XML_daily.asp",
-                date=datetime.now(),
+            now = datetime.now()
+            repository = CachedCurrencyToRublesRepository(
+                repository=BankOfRussiaCurrencyToRublesRepository(
+                    currency=Currency.DOLLAR,
+                    url="https://www.cbr.ru/scripts/XML_daily.asp",
+                    date=now,
+                ),
+                cache=get_rate_cache(),
+                date_=now.date(),
             )
+            history_repository = None
+            if settings.ORDERS_CONVERT_BY_DELIVERY_DATE:
+                history_repository = BankOfRussiaRatesHistoryRepository(
+                    currency=Currency.DOLLAR,
+                    url="https://www.cbr.ru/scripts/XML_dynamic.asp",
+                )
             parser = GoogleSheetsParser(
                 creds_path=settings.BASE_DIR / 'credentials.json',
                 token_path=settings.BASE_DIR / 'token.json',
                 repository=repository,
+                synchronizer=get_orders_synchronizer(),
+                state_repository=CacheSyncStateRepository(
+                    timeout=settings.ORDERS_SYNC_STATE_TIMEOUT
+                ),
+                history_repository=history_repository,
+                stream_window_size=settings.GOOGLE_SHEETS_STREAM_WINDOW_SIZE,
+                native_values=settings.GOOGLE_SHEETS_NATIVE_VALUES,
             )
             parser.set_up()
-            parser.parse()
+            return parser.parse()
         except (ConnectionError, ServerNotFoundError) as connection_error:
             self.logger.error(
                 "Connection error occurred: %s",
@@ -67,4 +113,10 @@ class ParseOrdersTask(Task):
             self.logger.error("An error occurred, %s. %s", type(error), error)
 
 
+@worker_process_init.connect
+def reset_sheets_clients(**kwargs) -> None:
+    """Don't share HTTP connections of the parent process with workers."""
+    clear_cached_clients()
+
+
 celery_app.register_task(ParseOrdersTask())
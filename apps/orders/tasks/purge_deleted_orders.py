@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from apps.orders.service.usecases.order import purge_deleted_orders
+from apps.orders.utils.logger import get_default_logger
+from celery import Task
+from django.conf import settings
+from django.utils import timezone
+from project import celery_app
+
+
+class PurgeDeletedOrdersTask(Task):
+    """Delete orders which were soft-deleted long ago, with their notifications."""
+
+    name = "apps.orders.tasks.PurgeDeletedOrdersTask"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.logger = get_default_logger("PurgeDeletedOrdersTask")
+
+    def run(self, *args, **kwargs):
+        deleted_before = timezone.now() - \
+            timedelta(days=settings.ORDERS_SOFT_DELETE_RETENTION_DAYS)
+        orders_purged = purge_deleted_orders(deleted_before)
+        self.logger.info(
+            "Purged %s orders deleted before %s",
+            orders_purged,
+            deleted_before
+        )
+
+
+celery_app.register_task(PurgeDeletedOrdersTask())
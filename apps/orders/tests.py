@@ -1,3 +1,185 @@
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from apps.feedback.models import NotificationsReceiver, OrderNotification
+from apps.orders.models import Order
+from apps.orders.service.parse.google_sheets_parser import GoogleSheetsParser
+from apps.orders.service.parse.row_batch import RowBatch
+from apps.orders.service.repositories.currency_repository.base import \
+    BaseCurrencyToRublesRepository
+from apps.orders.service.repositories.currency_repository.currencies import \
+    Currency
+from apps.orders.service.repositories.state_repository.base import \
+    BaseSyncStateRepository
+from apps.orders.service.sync.base import SyncResult
+from apps.orders.service.sync.bulk import BulkOrdersSynchronizer
+from apps.orders.service.usecases.order import (get_all_orders,
+                                                purge_deleted_orders)
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+HEADER = ["№", "заказ №", "стоимость,$", "срок поставки"]
+
+
+class FixedRateRepository(BaseCurrencyToRublesRepository):
+    """Repository returning the given number of rubles per dollar."""
+
+    def __init__(self, rubles_per_dollar: float) -> None:
+        super().__init__(Currency.DOLLAR)
+        self.rubles_per_dollar = rubles_per_dollar
+
+    def get_amount_of_rubles_per_currency(self) -> float:
+        return self.rubles_per_dollar
+
+
+class MemorySyncStateRepository(BaseSyncStateRepository):
+    """Repository keeping the synchronization state in a dict."""
+
+    def __init__(self) -> None:
+        self.values: Dict[str, str] = {}
+
+    def get(self, key: str) -> Optional[str]:
+        return self.values.get(key)
+
+    def set(self, key: str, value: str) -> None:
+        self.values[key] = value
+
+    def increment(self, key: str) -> int:
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+
+class StaticSheetsClient:
+    """Google Sheets client returning the given values."""
+
+    def __init__(self, values: List[list]) -> None:
+        self.values = values
+
+    def get_values(self, *args, **kwargs) -> List[list]:
+        return self.values
+
+
+def build_values(costs: List[float]) -> List[list]:
+    """Get sheet values with an order for every cost."""
+    return [HEADER] + [
+        [id_, f"order-{id_}", cost, 44600 + id_]
+        for id_, cost in enumerate(costs, start=1)
+    ]
+
+
+def sync_values(
+    values: List[list],
+    soft_delete: bool = False,
+    stream: bool = False
+) -> SyncResult:
+    """Synchronize orders with sheet values at 60 rubles per dollar."""
+    rows = RowBatch.from_values(values, 60.0)
+    return BulkOrdersSynchronizer(soft_delete=soft_delete).sync(iter(rows) if stream else rows)
+
+
+class BulkOrdersSynchronizerTestCase(TestCase):
+    # both are within one batch of bulk queries, even on SQLite
+    SMALL_ROW_COUNT = 10
+    LARGE_ROW_COUNT = 150
+
+    def iter_sheets(self, row_count: int) -> Iterator[List[list]]:
+        """Yield sheet values to create orders, to resync them unchanged and to change one."""
+        values = build_values([1.0] * row_count)
+        yield values
+        yield values
+        values[row_count // 2][2] = 2.0
+        yield values
+
+    def test_query_count_doesnt_depend_on_row_count(self):
+        query_counts = []
+        for values in self.iter_sheets(self.SMALL_ROW_COUNT):
+            with CaptureQueriesContext(connection) as context:
+                sync_values(values)
+            query_counts.append(len(context))
+        Order.objects.all().delete()
+
+        for values, query_count in zip(self.iter_sheets(self.LARGE_ROW_COUNT), query_counts):
+            with self.assertNumQueries(query_count):
+                sync_values(values)
+        self.assertEqual(Order.objects.count(), self.LARGE_ROW_COUNT)
+
+    def test_changes(self):
+        values = build_values([1.0, 2.0, 3.0])
+        result = sync_values(values)
+        self.assertEqual(result.changes.created, [1, 2, 3])
+
+        values[1][3] += 1
+        del values[3]
+        result = sync_values(values)
+
+        self.assertEqual(result.changes.created, [])
+        self.assertEqual(result.changes.updated, {1: ["delivery_date"]})
+        self.assertEqual(result.changes.deleted, [3])
+        self.assertEqual(result.unchanged, 1)
+        self.assertFalse(Order.objects.filter(id=3).exists())
+
+    def test_soft_deleted_orders_are_restored(self):
+        values = build_values([1.0, 2.0])
+        sync_values(values, soft_delete=True, stream=True)
+
+        result = sync_values(values[:2], soft_delete=True, stream=True)
+        self.assertEqual(result.changes.deleted, [2])
+        self.assertIsNotNone(Order.objects.get(id=2).deleted_at)
+        self.assertEqual(list(get_all_orders().values_list("id", flat=True)), [1])
+
+        result = sync_values(values, soft_delete=True, stream=True)
+        self.assertEqual(result.changes.deleted, [])
+        self.assertIn("deleted_at", result.changes.updated[2])
+        self.assertIsNone(Order.objects.get(id=2).deleted_at)
+
+
+class RepriceOrdersTestCase(TestCase):
+
+    def test_resync_after_reprice_changes_nothing(self):
+        values = build_values([0.5, 0.125, 1.005, 2.675, 10.375, 0.625, 3.875, 7.2])
+        state_repository = MemorySyncStateRepository()
+        for rubles_per_dollar in (60.0, 60.25):
+            parser = GoogleSheetsParser(
+                Path("creds"),
+                Path("token"),
+                FixedRateRepository(rubles_per_dollar),
+                state_repository=state_repository,
+                client=StaticSheetsClient(values),
+            )
+            parser.set_up()
+            parser.parse()
+        self.assertEqual(Order.objects.get(id=1).cost_rubles, 30.13)
+
+        result = BulkOrdersSynchronizer().sync(RowBatch.from_values(values, 60.25))
+
+        self.assertEqual(result.updated, 0)
+        self.assertEqual(result.unchanged, len(values) - 1)
+
+
+class PurgeDeletedOrdersTestCase(TestCase):
+
+    def test_purges_only_orders_deleted_before_the_time(self):
+        now = timezone.now()
+        receiver = NotificationsReceiver.objects.create(telegram_id="1")
+        for id_, deleted_at in ((1, now - timedelta(days=40)), (2, now), (3, None)):
+            Order.objects.create(
+                id=id_,
+                order_id=f"order-{id_}",
+                cost_dollars=1,
+                cost_rubles=60,
+                delivery_date=date(2022, 1, 1),
+                deleted_at=deleted_at,
+            )
+            OrderNotification.objects.create(order_id=id_, receiver=receiver, is_sent=True)
+
+        purged = purge_deleted_orders(now - timedelta(days=30))
 
-# Create your tests here.
+        self.assertEqual(purged, 1)
+        self.assertEqual(sorted(Order.objects.values_list("id", flat=True)), [2, 3])
+        self.assertEqual(
+            sorted(OrderNotification.objects.values_list("order_id", flat=True)),
+            [2, 3]
+        )
@@ -1,5 +1,20 @@
+from array import array
 from datetime import date, datetime
-from typing import Optional
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache, singledispatch
+from itertools import compress
+from sys import intern
+from typing import Any, List, Optional, Sequence, Tuple
+
+# Google Sheets counts serial numbers of dates from this day
+SHEETS_EPOCH_ORDINAL = date(1899, 12, 30).toordinal()
+# max number of distinct date cells remembered by the decoder
+DATE_CACHE_SIZE = 4096
+NATIVE_NUMBER_TYPES = {int, float}
+# precision of costs, in digits after the point
+COST_PRECISION = Decimal('0.01')
+
+DecodedColumns = Tuple['array[int]', List[str], 'array[float]', 'array[int]']
 
 
 def str_to_int(value: str) -> Optional[int]:
@@ -21,3 +36,192 @@ def str_to_date(value: str) -> Optional[date]:
         return datetime.strptime(value, '%d.%m.%Y').date()
     except ValueError:
         return None
+
+
+def serial_to_date(value: float) -> Optional[date]:
+    """Convert the serial number of Google Sheets to date.
+
+    The integer part is the number of days since 30.12.1899,
+    the fractional part is the time of day.
+    """
+    try:
+        return date.fromordinal(SHEETS_EPOCH_ORDINAL + int(value))
+    except (ValueError, OverflowError):
+        return None
+
+
+def round_cost(value: float) -> float:
+    """Round the cost to cents, half up.
+
+    Rounds the same way as `ROUND(CAST(value AS NUMERIC), 2)` in the database:
+    the float is cast to a decimal of 15 significant digits first,
+    so costs computed here and by SQL queries don't differ.
+    """
+    return float(Decimal(format(value, '.15g')).quantize(COST_PRECISION, ROUND_HALF_UP))
+
+
+@singledispatch
+def value_to_int(value: Any) -> Optional[int]:
+    """Convert the cell value, either native or formatted, to int."""
+    return None
+
+
+@value_to_int.register(str)
+def _(value: str) -> Optional[int]:
+    return str_to_int(value)
+
+
+@value_to_int.register(int)
+def _(value: int) -> Optional[int]:
+    return value
+
+
+@value_to_int.register(float)
+def _(value: float) -> Optional[int]:
+    return int(value) if value.is_integer() else None
+
+
+@singledispatch
+def value_to_float(value: Any) -> Optional[float]:
+    """Convert the cell value, either native or formatted, to float."""
+    return None
+
+
+@value_to_float.register(str)
+def _(value: str) -> Optional[float]:
+    return str_to_float(value)
+
+
+@value_to_float.register(int)
+@value_to_float.register(float)
+def _(value: float) -> Optional[float]:
+    return float(value)
+
+
+@singledispatch
+def value_to_date(value: Any) -> Optional[date]:
+    """Convert the cell value, either a serial number or formatted, to date."""
+    return None
+
+
+@value_to_date.register(str)
+def _(value: str) -> Optional[date]:
+    return str_to_date(value)
+
+
+@value_to_date.register(int)
+@value_to_date.register(float)
+def _(value: float) -> Optional[date]:
+    return serial_to_date(value)
+
+
+@singledispatch
+def value_to_str(value: Any) -> Optional[str]:
+    """Convert the cell value, either native or formatted, to str."""
+    return None
+
+
+@value_to_str.register(str)
+def _(value: str) -> Optional[str]:
+    return value
+
+
+@value_to_str.register(int)
+@value_to_str.register(float)
+def _(value: float) -> Optional[str]:
+    # whole numbers are displayed without the fractional part
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+@value_to_int.register(bool)
+@value_to_float.register(bool)
+@value_to_date.register(bool)
+@value_to_str.register(bool)
+def _(value: bool) -> None:
+    # checkboxes are booleans, which are ints in Python, but not numbers in the sheet
+    return None
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE, typed=True)
+def cached_value_to_date(value: Any) -> Optional[date]:
+    """Convert the cell value to date, remembering the results.
+
+    Sheets contain few distinct dates, so most of cells are parsed once.
+    """
+    return value_to_date(value)
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def cached_ordinal_to_date(ordinal: int) -> date:
+    """Convert the proleptic Gregorian ordinal to date, remembering the results."""
+    return date.fromordinal(ordinal)
+
+
+def column_to_ints(column: Sequence[Any]) -> List[Optional[int]]:
+    """Convert the column of cell values to ints at once.
+
+    Native ints are taken as is, other cells, i.e. the header, are converted.
+    """
+    return [
+        value if type(value) is int else value_to_int(value)
+        for value in column
+    ]
+
+
+def column_to_floats(column: Sequence[Any]) -> List[Optional[float]]:
+    """Convert the column of cell values to floats at once.
+
+    Native numbers are taken as is, other cells, i.e. the header, are converted.
+    """
+    return [
+        float(value) if type(value) in NATIVE_NUMBER_TYPES else value_to_float(value)
+        for value in column
+    ]
+
+
+def column_to_strs(column: Sequence[Any]) -> List[Optional[str]]:
+    """Convert the column of cell values to interned strs at once.
+
+    Repeated values of the column share one str object.
+    """
+    return [
+        intern(value) if type(value) is str else _intern_or_none(value_to_str(value))
+        for value in column
+    ]
+
+
+def _intern_or_none(value: Optional[str]) -> Optional[str]:
+    return None if value is None else intern(value)
+
+
+def decode_columns(values: Sequence[Sequence[Any]]) -> DecodedColumns:
+    """Decode the values of A:D range column-wise, skipping invalid rows.
+
+    Rows are invalid if some of cells is missing or can't be converted.
+
+    Args:
+        values (Sequence[Sequence[Any]]): Rows of cells, either native or formatted
+
+    Returns:
+        DecodedColumns: Ids, order ids, costs and ordinals of dates of valid rows
+    """
+    rows = [row for row in values if len(row) >= 4]
+    if not rows:
+        return array('q'), [], array('d'), array('i')
+    ids, order_ids, costs, dates = list(zip(*rows))[:4]
+    ids = column_to_ints(ids)
+    order_ids = column_to_strs(order_ids)
+    costs = column_to_floats(costs)
+    dates = list(map(cached_value_to_date, dates))
+    is_valid = [
+        None not in row
+        for row in zip(ids, order_ids, costs, dates)
+    ]
+    return (
+        array('q', compress(ids, is_valid)),
+        list(compress(order_ids, is_valid)),
+        array('d', compress(costs, is_valid)),
+        array('i', map(date.toordinal, compress(dates, is_valid))),
+    )
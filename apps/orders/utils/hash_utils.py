@@ -0,0 +1,16 @@
+import hashlib
+import json
+from typing import Any
+
+
+def get_fingerprint(data: Any) -> str:
+    """Get the content fingerprint of JSON serializable data.
+
+    Args:
+        data (Any): JSON serializable data
+
+    Returns:
+        str: Hex digest of data
+    """
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
@@ -0,0 +1,22 @@
+from itertools import islice
+from typing import Iterable, Iterator, List, TypeVar
+
+T = TypeVar("T")
+
+
+def chunked(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Split iterable into lists of at most `size` elements.
+
+    Args:
+        iterable (Iterable[T]): Source of elements
+        size (int): Max size of a single chunk
+
+    Yields:
+        List[T]: Chunk of elements
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
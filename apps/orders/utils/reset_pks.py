@@ -1,17 +1,42 @@
-from typing import Iterable
+from typing import Type
 
-from apps.orders.models import Order
 from django.core.management.color import no_style
 from django.db import connection
 from django.db.models import Model
 
 
-def reset_autoincrement_fields(models: Iterable[Model]) -> None:
-    """Reset the autoincrement fields in psql.
+def reset_autoincrement_field_if_behind(model: Type[Model], max_id: int) -> bool:
+    """Move the sequence of the autoincrement field past the explicitly inserted id.
 
-    i.e. id
+    On PostgreSQL the sequence is read with one query and moved only if
+    it is behind. Databases which track explicit ids by themselves,
+    like SQLite, don't issue any queries.
+
+    Args:
+        model (Type[Model]): Model with an autoincrement primary key
+        max_id (int): The greatest explicitly inserted id
+
+    Returns:
+        bool: True if the sequence was moved
     """
-    sequence_sql = connection.ops.sequence_reset_sql(no_style(), models)
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = model._meta.pk.column
+    if connection.vendor != "postgresql":
+        sequence_sql = connection.ops.sequence_reset_sql(no_style(), [model])
+        with connection.cursor() as cursor:
+            for sql in sequence_sql:
+                cursor.execute(sql)
+        return bool(sequence_sql)
     with connection.cursor() as cursor:
-        for sql in sequence_sql:
-            cursor.execute(sql)
+        cursor.execute(
+            "SELECT pg_sequence_last_value(pg_get_serial_sequence(%s, %s))",
+            [table, column]
+        )
+        last_value, = cursor.fetchone()
+        if last_value is not None and last_value >= max_id:
+            return False
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, %s), %s)",
+            [table, column, max_id]
+        )
+        return True
@@ -3,6 +3,7 @@ import os
 from django.conf import settings
 
 from celery import Celery
+from celery.schedules import crontab
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 app = Celery('project')
@@ -16,5 +17,22 @@ app.conf.update(
             'task': 'apps.orders.tasks.ParseOrdersTask',
             'schedule': settings.CELERY_PARSE_TASK_SCHEDULE,
         },
+        'notify_about_orders_due_today_at_midnight': {
+            'task': 'apps.feedback.tasks.SendNotificationsTask',
+            'schedule': crontab(minute=0, hour=0),
+            'kwargs': {'due_today': True},
+        },
+        'reconcile_notifications_every_day': {
+            'task': 'apps.feedback.tasks.SendNotificationsTask',
+            'schedule': settings.CELERY_NOTIFICATIONS_RECONCILE_SCHEDULE,
+        },
+        'deliver_notifications_every_minute': {
+            'task': 'apps.feedback.tasks.DeliverNotificationsTask',
+            'schedule': settings.CELERY_DELIVER_NOTIFICATIONS_SCHEDULE,
+        },
+        'purge_deleted_orders_every_day': {
+            'task': 'apps.orders.tasks.PurgeDeletedOrdersTask',
+            'schedule': settings.CELERY_PURGE_TASK_SCHEDULE,
+        },
     },
 )
@@ -35,6 +35,25 @@ ALLOWED_HOSTS = env.list('ALLOWED_HOSTS')
 
 TELEGRAM_TOKEN = env('TELEGRAM_TOKEN')
 
+# Base URL of Bot API server, i.e. a local one, the official server is used if empty
+TELEGRAM_API_URL = env('TELEGRAM_API_URL', default='')
+
+# Max number of messages sent per second, in total and to one chat
+TELEGRAM_GLOBAL_RATE_LIMIT = env.float('TELEGRAM_GLOBAL_RATE_LIMIT', default=30)
+TELEGRAM_CHAT_RATE_LIMIT = env.float('TELEGRAM_CHAT_RATE_LIMIT', default=1)
+
+# Max number of receivers notified at the same time
+NOTIFICATIONS_CONCURRENCY = env.int('NOTIFICATIONS_CONCURRENCY', default=20)
+
+# Number of outbox jobs claimed by a delivery task at once
+NOTIFICATIONS_CLAIM_SIZE = env.int('NOTIFICATIONS_CLAIM_SIZE', default=20)
+# Seconds a claimed job is owned by the worker, then it's claimed again
+NOTIFICATIONS_JOB_LEASE = env.int('NOTIFICATIONS_JOB_LEASE', default=600)
+# Failed jobs are retried with exponential backoff from RETRY_BACKOFF to RETRY_BACKOFF_MAX seconds
+NOTIFICATIONS_MAX_ATTEMPTS = env.int('NOTIFICATIONS_MAX_ATTEMPTS', default=5)
+NOTIFICATIONS_RETRY_BACKOFF = env.float('NOTIFICATIONS_RETRY_BACKOFF', default=60)
+NOTIFICATIONS_RETRY_BACKOFF_MAX = env.float('NOTIFICATIONS_RETRY_BACKOFF_MAX', default=3600)
+
 
 # Application definition
 
@@ -73,6 +92,51 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TASK_SERIALIZER = 'json'
 
 CELERY_PARSE_TASK_SCHEDULE = env.int('PARSE_ORDERS_TASK_SCHEDULE', default=60)
+CELERY_PURGE_TASK_SCHEDULE = env.int('PURGE_DELETED_ORDERS_TASK_SCHEDULE', default=86400)
+# Picks up retried and abandoned notification jobs
+CELERY_DELIVER_NOTIFICATIONS_SCHEDULE = env.int(
+    'DELIVER_NOTIFICATIONS_TASK_SCHEDULE',
+    default=60
+)
+# Notifications follow changes of orders and are checked for orders delivered today
+# at midnight, the full run catches runs missed while workers were down
+CELERY_NOTIFICATIONS_RECONCILE_SCHEDULE = env.int(
+    'RECONCILE_NOTIFICATIONS_TASK_SCHEDULE',
+    default=86400
+)
+
+# Above this number of changed orders notifications are checked for all orders
+NOTIFICATIONS_MAX_CHANGED_ORDERS = env.int('NOTIFICATIONS_MAX_CHANGED_ORDERS', default=1000)
+
+# Number of rows fetched from Google Sheets per window, 0 fetches the whole sheet at once
+GOOGLE_SHEETS_STREAM_WINDOW_SIZE = env.int('GOOGLE_SHEETS_STREAM_WINDOW_SIZE', default=0)
+
+# Fetch numbers and dates unformatted instead of parsing displayed strings
+GOOGLE_SHEETS_NATIVE_VALUES = env.bool('GOOGLE_SHEETS_NATIVE_VALUES', default=True)
+
+# Writer of parsed orders: bulk (ORM) or copy (PostgreSQL COPY, bulk on other databases)
+ORDERS_SYNC_BACKEND = env('ORDERS_SYNC_BACKEND', default='bulk')
+
+# Max number of orders written by a single query during synchronization
+ORDERS_SYNC_BATCH_SIZE = env.int('ORDERS_SYNC_BATCH_SIZE', default=1000)
+
+# Seconds after which the state of the last synchronization is forgotten,
+# so unchanged data is fully resynchronized at least that often
+ORDERS_SYNC_STATE_TIMEOUT = env.int('ORDERS_SYNC_STATE_TIMEOUT', default=3600)
+
+# Storage of exchange rates: memory, cache (django cache, i.e. Redis) or database
+CURRENCY_RATE_CACHE = env('CURRENCY_RATE_CACHE', default='cache')
+CURRENCY_RATE_CACHE_TIMEOUT = env.int('CURRENCY_RATE_CACHE_TIMEOUT', default=86400)
+
+# Mark orders missing from the sheet as deleted instead of deleting them,
+# so their notifications survive if the rows come back
+ORDERS_SOFT_DELETE = env.bool('ORDERS_SOFT_DELETE', default=False)
+
+# Days after which soft-deleted orders are deleted for good
+ORDERS_SOFT_DELETE_RETENTION_DAYS = env.int('ORDERS_SOFT_DELETE_RETENTION_DAYS', default=30)
+
+# Convert each order at the rate of its delivery date instead of the current rate
+ORDERS_CONVERT_BY_DELIVERY_DATE = env.bool('ORDERS_CONVERT_BY_DELIVERY_DATE', default=False)
 
 ROOT_URLCONF = 'project.urls'
 
@@ -103,6 +167,21 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+
+CACHE_REDIS_URL = env('CACHE_REDIS_URL', default=None)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+    } if CACHE_REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -133,6 +212,8 @@ LANGUAGES = (
 )
 
 TIME_ZONE = 'UTC'
+# crontab schedules, i.e. the midnight notifications run, follow the django time zone
+CELERY_TIMEZONE = TIME_ZONE
 
 USE_I18N = True
 